@@ -54,6 +54,10 @@ class DipoleWidgetFD(object):
     ymin, ymax = -50.0, 50.0
     zmin, zmax = -50.0, 50.0
 
+    # quadtree sampling of the section, refined near the source and where
+    # the fields are steep, instead of evaluating every grid node
+    adaptive = False
+
     def __init__(self):
         self.dataview = DataView()
 
@@ -90,7 +94,9 @@ class DipoleWidgetFD(object):
         else:
             raise NotImplementedError()
 
-        self.dataview.eval_2D(srcLoc, sig, f, orientation, self.func)  # evaluate
+        self.dataview.eval_2D(
+            srcLoc, sig, f, orientation, self.func, adaptive=self.adaptive
+        )  # evaluate
 
     def SetGrid(self, normal, loc, na, nb):
         # Assume we are seeing xy plane
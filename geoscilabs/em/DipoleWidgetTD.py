@@ -53,6 +53,10 @@ class DipoleWidgetTD(object):
     ymin, ymax = -50.0, 50.0
     zmin, zmax = -50.0, 50.0
 
+    # quadtree sampling of the section, refined near the source and where
+    # the fields are steep, instead of evaluating every grid node
+    adaptive = False
+
     def __init__(self):
         self.dataview = DataView()
 
@@ -89,7 +93,9 @@ class DipoleWidgetTD(object):
         else:
             raise NotImplementedError()
 
-        self.dataview.eval_2D_TD(srcLoc, sig, t, orientation, self.func)  # evaluate
+        self.dataview.eval_2D_TD(
+            srcLoc, sig, t, orientation, self.func, adaptive=self.adaptive
+        )  # evaluate
 
     def SetGrid(self, normal, loc, na, nb):
         # Assume we are seeing xy plane
@@ -413,7 +419,6 @@ def InteractiveDipoleProfileTD(self, Sigma, Field, compvalue, Scale):
     def foo(Component, Profile, Sigma, T1, T2, T3, Scale, irx):
         #     Scale = "log"
         orientation = "z"
-        vals = []
 
         if Field == "E":
             unit = " (V/m)"
@@ -458,19 +463,17 @@ def InteractiveDipoleProfileTD(self, Sigma, Field, compvalue, Scale):
             gs1.update(left=0.05, right=0.48, wspace=0.05)
             ax1 = plt.subplot(gs1[:2, :3])
 
-        for ifreq, t in enumerate(T):
-            vals.append(
-                self.dataview.eval_TD(
-                    xyz_line,
-                    srcLoc,
-                    np.r_[Sigma],
-                    np.r_[t],
-                    orientation,
-                    self.dataview.func2D,
-                )
-            )
-            # for ifreq, f in enumerate(F):
-            valr = vals[ifreq][icomp]
+        # a single (nRx, ntime) evaluation for all profile times
+        vals = self.dataview.eval_TD(
+            xyz_line,
+            srcLoc,
+            np.r_[Sigma],
+            np.array(T),
+            orientation,
+            self.dataview.func2D,
+        )
+        for itime in range(len(T)):
+            valr = vals[icomp][:, itime]
 
             if Scale == "log":
                 valr_p, valr_n = DisPosNegvalues(valr)
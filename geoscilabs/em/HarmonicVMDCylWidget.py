@@ -11,10 +11,13 @@ from PIL import Image
 from scipy.constants import mu_0
 import requests
 from io import StringIO
+import hashlib
+from collections import OrderedDict
 
 from ..base import widgetify
 from .DipoleWidgetFD import DisPosNegvalues
 from .BiotSavart import BiotSavartFun
+from .ResultStore import ResultStore
 
 
 class HarmonicVMDCylWidget(object):
@@ -28,8 +31,13 @@ class HarmonicVMDCylWidget(object):
     srcLoc = None
     mesh2D = None
     mu = None
+    # number of system factorizations kept across simulate calls, keyed on
+    # (model hash, frequency); the data widgets sweep 31 frequencies
+    factorization_cache_size = 64
 
     def __init__(self):
+        self._factorizations = OrderedDict()
+        self.store = ResultStore()
         self.genMesh()
         self.getCoreDomain()
         # url = "http://em.geosci.xyz/_images/disc_dipole.png"
@@ -37,12 +45,10 @@ class HarmonicVMDCylWidget(object):
         # self.im = Image.open(StringIO(response.content))
 
     def mirrorArray(self, x, direction="x"):
-        X = x.reshape((self.nx_core, self.ny_core), order="F")
+        X2 = utils.mkvc(x)[self.mirrorInd]
         if direction == "x" or direction == "y":
-            X2 = np.vstack((-np.flipud(X), X))
-        else:
-            X2 = np.vstack((np.flipud(X), X))
-        return X2
+            X2 = X2 * self.mirrorSign
+        return X2.reshape((2 * self.nx_core, self.ny_core), order="F")
 
     def genMesh(self, h=0.0, cs=3.0, ncx=15, ncz=30, npad=20):
         """
@@ -71,6 +77,43 @@ class HarmonicVMDCylWidget(object):
         hx = np.r_[self.mesh.h[0][xind][::-1], self.mesh.h[0][xind]]
         hz = self.mesh.h[2][yind]
         self.mesh2D = TensorMesh([hx, hz], x0="CC")
+        self.getCoreOperators()
+
+    def getCoreOperators(self):
+        """
+            Index maps and interpolation matrices from the mesh to the
+            mirrored core domain (mesh2D), built once with the mesh
+        """
+        core = np.arange(self.nx_core * self.ny_core).reshape(
+            (self.nx_core, self.ny_core), order="F"
+        )
+        self.mirrorInd = utils.mkvc(np.vstack((np.flipud(core), core)))
+        self.mirrorSign = utils.mkvc(
+            np.vstack((-np.ones_like(core), np.ones_like(core)))
+        )
+        self.mirrorCC = np.where(self.activeCC)[0][self.mirrorInd]
+
+        gridCC = self.mesh.cell_centers[self.mirrorCC, :]
+        Sxy = utils.sdiag(self.mirrorSign)
+        self.Pfx = Sxy * self.mesh.get_interpolation_matrix(gridCC, location_type="Fx")
+        self.Pfz = self.mesh.get_interpolation_matrix(gridCC, location_type="Fz")
+        self.Pey = Sxy * self.mesh.aveE2CC[self.mirrorCC, :]
+
+    def getRxOperators(self):
+        """
+            Interpolation matrices to the receiver locations, rebuilt only when
+            rxLoc changes
+        """
+        key = np.asarray(self.rxLoc, dtype=float).tobytes()
+        if getattr(self, "_rxKey", None) != key:
+            self._rxKey = key
+            self._rxOperators = {
+                locType: self.mesh.get_interpolation_matrix(
+                    self.rxLoc, location_type=locType
+                )
+                for locType in ["Fx", "Fz", "Ey"]
+            }
+        return self._rxOperators
 
     def getCoreModel(self, Type):
 
@@ -196,38 +239,71 @@ class HarmonicVMDCylWidget(object):
             self.mesh, survey=survey, sigmaMap=self.mapping, mu=self.mu, solver=Pardiso
         )
 
-        self.f = sim.fields(self.m)
+        # the fields do not depend on the receivers, so they are not part of
+        # the key of the stored solution
+        sim.model = self.m
+        key = ResultStore.key(
+            type(sim).__name__,
+            *self.mesh.h,
+            self.mesh.origin,
+            sim.sigma,
+            self.mu,
+            np.asarray(srcLoc, dtype=float),
+            np.asarray(freqs, dtype=float),
+        )
+        stored = self.store.load(key)
+        if stored is None:
+            self.f = self.fields(sim)
+            self.store.save(key, u=self.f[:, sim._solutionType])
+        else:
+            self.f = sim.fieldsPair(sim)
+            self.f[:, sim._solutionType] = stored["u"]
         self.sim = sim
         dpred = sim.dpred(self.m, f=self.f)
         self.srcLoc = srcLoc
         self.rxLoc = rxLoc
         return dpred
 
+    def fields(self, sim):
+        """
+            Same as sim.fields(self.m), reusing the factorizations of earlier
+            simulations of the same model and frequency
+        """
+        sim.model = self.m
+        model = hashlib.sha1(np.r_[sim.sigma, self.mu].tobytes()).hexdigest()
+
+        f = sim.fieldsPair(sim)
+        for freq in sim.survey.frequencies:
+            key = (model, float(freq))
+            if key in self._factorizations:
+                self._factorizations.move_to_end(key)
+                Ainv = self._factorizations[key]
+            else:
+                Ainv = sim.solver(sim.getA(freq), **sim.solver_opts)
+                self._factorizations[key] = Ainv
+                while len(self._factorizations) > self.factorization_cache_size:
+                    self._factorizations.popitem(last=False)[1].clean()
+
+            Srcs = sim.survey.get_sources_by_frequency(freq)
+            f[Srcs, sim._solutionType] = Ainv * sim.getRHS(freq)
+        return f
+
     def getFields(self, bType="b", ifreq=0):
         src = self.srcList[ifreq]
-        Pfx = self.mesh.get_interpolation_matrix(
-            self.mesh.cell_centers[self.activeCC, :], location_type="Fx"
-        )
-        Pfz = self.mesh.get_interpolation_matrix(
-            self.mesh.cell_centers[self.activeCC, :], location_type="Fz"
-        )
-        Ey = self.mesh.aveE2CC * self.f[src, "e"]
-        Jy = utils.sdiag(self.sim.sigma) * Ey
+        e = self.f[src, "e"]
 
-        self.Ey = utils.mkvc(self.mirrorArray(Ey[self.activeCC], direction="y"))
-        self.Jy = utils.mkvc(self.mirrorArray(Jy[self.activeCC], direction="y"))
-        self.Bx = utils.mkvc(self.mirrorArray(Pfx * self.f[src, bType], direction="x"))
-        self.Bz = utils.mkvc(self.mirrorArray(Pfz * self.f[src, bType], direction="z"))
+        self.Ey = utils.mkvc(self.Pey * e)
+        self.Jy = self.sim.sigma[self.mirrorCC] * self.Ey
+        self.Bx = utils.mkvc(self.Pfx * self.f[src, bType])
+        self.Bz = utils.mkvc(self.Pfz * self.f[src, bType])
 
     def getData(self, bType="b"):
 
-        Pfx = self.mesh.get_interpolation_matrix(self.rxLoc, location_type="Fx")
-        Pfz = self.mesh.get_interpolation_matrix(self.rxLoc, location_type="Fz")
-        Pey = self.mesh.get_interpolation_matrix(self.rxLoc, location_type="Ey")
+        P = self.getRxOperators()
 
-        self.Ey = (Pey * self.f[:, "e"]).flatten()
-        self.Bx = (Pfx * self.f[:, bType]).flatten()
-        self.Bz = (Pfz * self.f[:, bType]).flatten()
+        self.Ey = (P["Ey"] * self.f[:, "e"]).flatten()
+        self.Bx = (P["Fx"] * self.f[:, bType]).flatten()
+        self.Bz = (P["Fz"] * self.f[:, bType]).flatten()
 
     def plotField(
         self,
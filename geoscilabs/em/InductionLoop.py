@@ -1,3 +1,5 @@
+from collections import OrderedDict
+
 import numpy as np
 import scipy.special as sp
 import matplotlib.pyplot as plt
@@ -102,6 +104,163 @@ def fcn_TDEM_Widget(I, a1, a2, xRx, zRx, azm, logR, logL, logt):
     plt.show(fig1)
 
 
+############################################
+#   PRIMARY FIELD OF THE TRANSMITTER LOOP
+############################################
+
+
+def fcn_ComputePrimaryRegion(a1, X, Z):
+    """Primary field of the transmitter loop for a unit current at (X, Z)"""
+
+    eps = 1e-6
+    mu0 = 4 * np.pi * 1e-7  # 1e9*mu0
+
+    X = np.asarray(X, dtype=float)
+    Z = np.asarray(Z, dtype=float)
+
+    s = np.abs(X)  # Define Radial Distance
+
+    k = 4 * a1 * s / (Z ** 2 + (a1 + s) ** 2)
+
+    bot = Z ** 2 + (s - a1) ** 2
+
+    bot = np.where(bot == 0, np.nan, bot)
+
+    K = sp.ellipk(k)
+    E = sp.ellipe(k)
+
+    Bpx = (
+        mu0
+        * np.sign(X)
+        * (Z / (2 * np.pi * s + eps))
+        * (1 / np.sqrt(Z ** 2 + (a1 + s) ** 2))
+        * (-K + (a1 ** 2 + Z ** 2 + s ** 2) / bot * E)
+    )
+    Bpz = (
+        mu0
+        * (1 / (2 * np.pi))
+        * (1 / np.sqrt(Z ** 2 + (a1 + s) ** 2))
+        * (K + (a1 ** 2 - Z ** 2 - s ** 2) / bot * E)
+    )
+    Bpx[
+        (X > -1.025 * a1) & (X < -0.975 * a1) & (Z > -0.025 * a1) & (Z < 0.025 * a1)
+    ] = 0.0
+    Bpx[
+        (X < 1.025 * a1) & (X > 0.975 * a1) & (Z > -0.025 * a1) & (Z < 0.025 * a1)
+    ] = 0.0
+    Bpz[
+        (X > -1.025 * a1) & (X < -0.975 * a1) & (Z > -0.025 * a1) & (Z < 0.025 * a1)
+    ] = 0.0
+    Bpz[
+        (X < 1.025 * a1) & (X > 0.975 * a1) & (Z > -0.025 * a1) & (Z < 0.025 * a1)
+    ] = 0.0
+
+    return Bpx, Bpz
+
+
+# Unit-current primary fields per (a1, grid); the current is a multiply
+_primary_cache = OrderedDict()
+primary_cache_size = 8
+
+
+############################################
+#   INDUCED CURRENT OF THE RECEIVER LOOP
+############################################
+
+# Frequencies of the spectrum and times of the off-time decay
+fd_frequencies = np.logspace(0, 8, 101)
+td_times = np.logspace(-6, 0, 101)
+
+
+def _rl_circuit(Phi, R, L, x):
+    """Flux, resistance and inductance broadcast together, followed by one axis
+    per axis of the times or frequencies x"""
+    Phi, R, L = np.broadcast_arrays(Phi, R, L)
+    shape = Phi.shape + (1,) * np.ndim(x)
+    return [np.asarray(v, dtype=float).reshape(shape) for v in (Phi, R, L)]
+
+
+def fcn_ComputeRLCos(Phi, R, L, f, t):
+    """Induced current for a cosine primary of frequency f at times t
+
+    Phi, R and L may be arrays of circuits, followed by the axes of t in the
+    output.
+    """
+
+    Phi, R, L = _rl_circuit(Phi, R, L, t)
+    w = 2 * np.pi * f
+    t = np.asarray(t)
+
+    phi = np.arctan(R / (w * L)) - np.pi  # This is the phase and not phase lag
+    A = w * Phi / (R * np.sin(phi) + w * L * np.cos(phi))
+    Is = -A * np.cos(w * t + phi)
+    Ire = -A * np.cos(w * t) * np.cos(phi)
+    Iim = A * np.sin(w * t) * np.sin(phi)
+    phi = phi.reshape(phi.shape[: phi.ndim - t.ndim])
+
+    return Ire[()], Iim[()], Is[()], phi[()]
+
+
+def fcn_ComputeRLSpectrum(Phi, R, L, f=fd_frequencies):
+    """EMF and induced current spectrum of RL circuits with flux Phi
+
+    Phi, R and L may be arrays of circuits, followed by the axes of f in the
+    output.
+    """
+
+    Phi, R, L = _rl_circuit(Phi, R, L, f)
+    w = 2 * np.pi * np.asarray(f)
+
+    EMF = -1j * w * Phi
+    Is = EMF / (R + 1j * w * L)
+
+    return EMF, Is
+
+
+def fcn_ComputeRLDecay(Phi, R, L, t=td_times):
+    """Off-time voltage and induced current decay of RL circuits with flux Phi
+
+    Phi, R and L may be arrays of circuits, followed by the axes of t in the
+    output.
+    """
+
+    Phi, R, L = _rl_circuit(Phi, R, L, t)
+
+    decay = np.exp(-(R / L) * np.asarray(t))
+    Is = (Phi / L) * decay
+    V = (Phi * R / L) * decay - (Phi * R / L ** 2) * decay
+
+    return V, Is
+
+
+def fcn_FitTimeConstant(t, Is):
+    """Time constants and amplitudes of decays Is = A*exp(-t/tau)
+
+    Is holds one decay per row (t is the last axis). log|Is| is fitted by
+    least squares weighted with Is**2, which accounts for the noise of the
+    late, small samples; zero samples are ignored.
+    """
+
+    t = np.asarray(t, dtype=float)
+    Is = np.asarray(Is, dtype=float)
+
+    W = Is ** 2
+    with np.errstate(divide="ignore"):
+        y = np.where(W > 0, np.log(np.abs(Is)), 0.0)
+
+    Sw = np.sum(W, axis=-1)
+    St = np.sum(W * t, axis=-1)
+    Sy = np.sum(W * y, axis=-1)
+    Stt = np.sum(W * t ** 2, axis=-1)
+    Sty = np.sum(W * t * y, axis=-1)
+
+    slope = (Sw * Sty - St * Sy) / (Sw * Stt - St ** 2)
+    tau = -1 / slope
+    A = np.sign(np.sum(Is, axis=-1)) * np.exp((Sy - slope * St) / Sw)
+
+    return tau, A
+
+
 ############################################
 #   DEFINE CLASS
 ############################################
@@ -146,53 +305,20 @@ class IndEx:
         # Initiate Variables from object
         I = self.I
         a1 = self.a1
-        eps = 1e-6
-        mu0 = 4 * np.pi * 1e-7  # 1e9*mu0
-
-        s = np.abs(X)  # Define Radial Distance
 
-        k = 4 * a1 * s / (Z ** 2 + (a1 + s) ** 2)
-
-        bot = Z ** 2 + (s - a1) ** 2
-
-        try:
-            bot[bot==0] = np.NaN
-        except:
-            pass
-
-        Bpx = (
-            mu0
-            * np.sign(X)
-            * (Z * I / (2 * np.pi * s + eps))
-            * (1 / np.sqrt(Z ** 2 + (a1 + s) ** 2))
-            * (
-                -sp.ellipk(k)
-                + (a1 ** 2 + Z ** 2 + s ** 2) / bot
-                * sp.ellipe(k)
-            )
-        )
-        Bpz = (
-            mu0
-            * (I / (2 * np.pi))
-            * (1 / np.sqrt(Z ** 2 + (a1 + s) ** 2))
-            * (
-                sp.ellipk(k)
-                + (a1 ** 2 - Z ** 2 - s ** 2) / bot
-                * sp.ellipe(k)
-            )
-        )
-        Bpx[
-            (X > -1.025 * a1) & (X < -0.975 * a1) & (Z > -0.025 * a1) & (Z < 0.025 * a1)
-        ] = 0.0
-        Bpx[
-            (X < 1.025 * a1) & (X > 0.975 * a1) & (Z > -0.025 * a1) & (Z < 0.025 * a1)
-        ] = 0.0
-        Bpz[
-            (X > -1.025 * a1) & (X < -0.975 * a1) & (Z > -0.025 * a1) & (Z < 0.025 * a1)
-        ] = 0.0
-        Bpz[
-            (X < 1.025 * a1) & (X > 0.975 * a1) & (Z > -0.025 * a1) & (Z < 0.025 * a1)
-        ] = 0.0
+        X = np.asarray(X, dtype=float)
+        Z = np.asarray(Z, dtype=float)
+        key = (float(a1), X.shape, Z.shape, X.tobytes(), Z.tobytes())
+        if key in _primary_cache:
+            _primary_cache.move_to_end(key)
+        else:
+            _primary_cache[key] = fcn_ComputePrimaryRegion(a1, X, Z)
+            while len(_primary_cache) > primary_cache_size:
+                _primary_cache.popitem(last=False)
+        Bpx, Bpz = _primary_cache[key]
+
+        Bpx = I * Bpx
+        Bpz = I * Bpz
         Babs = np.sqrt(Bpx ** 2 + Bpz ** 2)
 
         return Bpx, Bpz, Babs
@@ -218,10 +344,7 @@ class IndEx:
         k = 4 * a1 * s / (z ** 2 + (a1 + s) ** 2)
 
         bot = z ** 2 + (s - a1) ** 2
-        try:
-            bot[bot == 0.0] = np.NaN
-        except:
-            pass
+        bot = np.where(bot == 0.0, np.nan, bot)[()]
 
         Bpx = (
             mu0
@@ -254,6 +377,16 @@ class IndEx:
         self.Bpn = Bpn
         self.Area = Area
 
+    def calc_Flux(self):
+        """Primary flux through the receiver loop"""
+
+        azm = np.pi * self.azm / 180.0
+
+        ax = np.pi * self.a2 ** 2 * np.sin(azm)
+        Az = np.pi * self.a2 ** 2 * np.cos(azm)
+
+        return ax * self.Bpx + Az * self.Bpz
+
     def calc_IndCurrent_Cos_i(self, f, t):
         """Induced current at particular time and frequency"""
 
@@ -280,33 +413,7 @@ class IndEx:
     def calc_IndCurrent_cos_range(self, f, t):
         """Induced current over a range of times"""
 
-        Bpx = self.Bpx
-        Bpz = self.Bpz
-        a2 = self.a2
-        azm = np.pi * self.azm / 180.0
-        R = self.R
-        L = self.L
-
-        w = 2 * np.pi * f
-
-        ax = np.pi * a2 ** 2 * np.sin(azm)
-        Az = np.pi * a2 ** 2 * np.cos(azm)
-
-        Phi = ax * Bpx + Az * Bpz
-        phi = np.arctan(R / (w * L)) - np.pi  # This is the phase and not phase lag
-        Is = -(w * Phi / (R * np.sin(phi) + w * L * np.cos(phi))) * np.cos(w * t + phi)
-        Ire = (
-            -(w * Phi / (R * np.sin(phi) + w * L * np.cos(phi)))
-            * np.cos(w * t)
-            * np.cos(phi)
-        )
-        Iim = (
-            (w * Phi / (R * np.sin(phi) + w * L * np.cos(phi)))
-            * np.sin(w * t)
-            * np.sin(phi)
-        )
-
-        return Ire, Iim, Is, phi
+        return fcn_ComputeRLCos(self.calc_Flux(), self.R, self.L, f, t)
 
     def calc_IndCurrent_FD_i(self, f):
         """Give FD EMF and current for single frequency"""
@@ -333,24 +440,7 @@ class IndEx:
     def calc_IndCurrent_FD_spectrum(self):
         """Gives FD induced current spectrum"""
 
-        # INITIALIZE ATTRIBUTES
-        Bpx = self.Bpx
-        Bpz = self.Bpz
-        a2 = self.a2
-        azm = np.pi * self.azm / 180.0
-        R = self.R
-        L = self.L
-
-        w = 2 * np.pi * np.logspace(0, 8, 101)
-
-        ax = np.pi * a2 ** 2 * np.sin(azm)
-        Az = np.pi * a2 ** 2 * np.cos(azm)
-
-        Phi = ax * Bpx + Az * Bpz
-        EMF = -1j * w * Phi
-        Is = EMF / (R + 1j * w * L)
-
-        return EMF, Is
+        return fcn_ComputeRLSpectrum(self.calc_Flux(), self.R, self.L)
 
     def calc_IndCurrent_TD_i(self, t):
         """Give FD EMF and current for single frequency"""
@@ -376,26 +466,7 @@ class IndEx:
     def calc_IndCurrent_TD_offtime(self):
         """Gives FD induced current spectrum"""
 
-        # INITIALIZE ATTRIBUTES
-        Bpx = self.Bpx
-        Bpz = self.Bpz
-        a2 = self.a2
-        azm = np.pi * self.azm / 180.0
-        R = self.R
-        L = self.L
-
-        t = np.logspace(-6, 0, 101)
-
-        ax = np.pi * a2 ** 2 * np.sin(azm)
-        Az = np.pi * a2 ** 2 * np.cos(azm)
-
-        Phi = ax * Bpx + Az * Bpz
-        Is = (Phi / L) * np.exp(-(R / L) * t)
-        V = (Phi * R / L) * np.exp(-(R / L) * t) - (Phi * R / L ** 2) * np.exp(
-            -(R / L) * t
-        )
-
-        return V, Is
+        return fcn_ComputeRLDecay(self.calc_Flux(), self.R, self.L)
 
     ###########################################
     #    PLOTTING FUNCTIONS
@@ -424,7 +495,7 @@ class IndEx:
         ax.plot(xRx, zRx, color="black", linewidth=6)
         ax.plot(xRx, zRx, color=((0.4, 0.4, 0.4)), linewidth=4)
         # Cplot = ax.contourf(X,Z,np.log10(Babs),40,cmap='ocean_r')
-        Babs[Babs == 0.0] = np.NaN
+        Babs[Babs == 0.0] = np.nan
         Cplot = ax.contourf(X, Z, np.log10(1e9 * Babs), 40, cmap="viridis")
         cbar = plt.colorbar(Cplot, ax=ax, pad=0.02)
         cbar.set_label(
@@ -668,7 +739,7 @@ class IndEx:
 
         Imax = np.max(Is)
 
-        t = np.logspace(-6, 0, 101)
+        t = td_times
 
         ax.grid("both", linestyle="-", linewidth=0.8, color=[0.8, 0.8, 0.8])
         ax.semilogx(t, Is, color="k", linewidth=4)
@@ -680,6 +751,26 @@ class IndEx:
             linewidth=3,
         )
 
+        # time constant fitted to the decay, L/R for a single circuit
+        if np.count_nonzero(Is) > 1:
+            tau = fcn_FitTimeConstant(t, Is)[0]
+            ax.semilogx(
+                tau * np.array([1.0, 1.0]),
+                np.array([0, 1.3 * Imax]),
+                color="b",
+                ls="--",
+                linewidth=2,
+            )
+            ax.text(
+                0.97,
+                0.9,
+                "$\\tau$ = " + "{:.2e}".format(tau) + " s",
+                transform=ax.transAxes,
+                ha="right",
+                fontsize=FS,
+                color="b",
+            )
+
         ax.set_xlabel("Time [s]", fontsize=FS + 2)
         ax.set_ylabel("$\mathbf{I_s (\omega)}$ [A]", fontsize=FS + 2, labelpad=-10)
         ax.set_title("Transient Induced Current", fontsize=FS)
@@ -1,9 +1,13 @@
+from collections import OrderedDict
+
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.ticker import ScalarFormatter, FormatStrFormatter
 from matplotlib.path import Path
 import matplotlib.patches as patches
 
+from ._sphere_common import cached, fcn_ComputeCoupling, fcn_ComputeKernel
+
 
 ##############################################
 #   PLOTTING FUNCTIONS FOR WIDGETS
@@ -238,6 +242,13 @@ def fcn_ComputePrimary(m, orient, xtx, ytx, ztx, X, Y, Z):
     return Hpx, Hpy, Hpz
 
 
+# The response is the excitation spectrum, which depends on (f, sig, mur, a),
+# times the kernel, which depends on the geometry; both are cached
+_excitation_cache = OrderedDict()
+_kernel_cache = OrderedDict()
+response_cache_size = 16
+
+
 ##############################################
 #   GLOBAL PLOTTING FUNTIONS
 ##############################################
@@ -546,31 +557,88 @@ class SphereFEM:
         ytx = self.ytx
         ztx = self.ztx
 
-        chi = fcn_ComputeExcitation_FEM(f, sig, mur, a)
-        Hpx, Hpy, Hpz = fcn_ComputePrimary(m, orient, xtx, ytx, ztx, x0, y0, z0)
-
-        mx = 4 * np.pi * a ** 3 * chi * Hpx / 3
-        my = 4 * np.pi * a ** 3 * chi * Hpy / 3
-        mz = 4 * np.pi * a ** 3 * chi * Hpz / 3
-        R = np.sqrt((X - x0) ** 2 + (Y - y0) ** 2 + (Z - z0) ** 2)
-        try:
-            # Don't throw divide by 0 warning for 0 R
-            R[R == 0] = 1.0
-        except:
-            pass
-
-        Hx = (1 / (4 * np.pi)) * (
-            3 * (X - x0) * (mx * (X - x0) + my * (Y - y0) + mz * (Z - z0)) / R ** 5
-            - mx / R ** 3
+        excitation = (f, sig, mur, a)
+        geometry = (m, orient, xtx, ytx, ztx, a, x0, y0, z0, X, Y, Z)
+        chi = cached(
+            _excitation_cache,
+            response_cache_size,
+            fcn_ComputeExcitation_FEM,
+            *excitation,
+        )
+        Gx, Gy, Gz = cached(
+            _kernel_cache, response_cache_size, fcn_ComputeKernel, *geometry
+        )
+
+        Hx = chi * Gx
+        Hy = chi * Gy
+        Hz = chi * Gz
+        Habs = np.sqrt(
+            np.real(Hx) ** 2 + np.real(Hy) ** 2 + np.real(Hz) ** 2
+        ) + 1j * np.sqrt(np.imag(Hx) ** 2 + np.imag(Hy) ** 2 + np.imag(Hz) ** 2)
+
+        return Hx, Hy, Hz, Habs
+
+
+class SphereCollectionFEM:
+    """Superposed response of many spheres, ignoring their mutual coupling
+    Input variables:
+
+        sig, mur, a, x0, y0, z0: arrays (or scalars) of the sphere
+        conductivities, relative permeabilities, radii and centres
+
+        Output variables:
+    """
+
+    def __init__(self, m, orient, xtx, ytx, ztx):
+        """Defines Initial Attributes"""
+
+        self.m = m
+        self.orient = orient
+        self.xtx = xtx
+        self.ytx = ytx
+        self.ztx = ztx
+
+    ############################################
+    #   DEFINE METHODS
+
+    def fcn_ComputeFrequencyResponse(self, f, sig, mur, a, x0, y0, z0, X, Y, Z):
+        """Compute Frequency Response of All Spheres at (X,Y,Z)"""
+
+        m = self.m
+        orient = self.orient
+        xtx = self.xtx
+        ytx = self.ytx
+        ztx = self.ztx
+
+        sig, mur, a, x0, y0, z0 = np.broadcast_arrays(
+            *np.atleast_1d(sig, mur, a, x0, y0, z0)
         )
-        Hy = (1 / (4 * np.pi)) * (
-            3 * (Y - y0) * (mx * (X - x0) + my * (Y - y0) + mz * (Z - z0)) / R ** 5
-            - my / R ** 3
+
+        # Excitation factors of the unique (sig, mur, a), computed at once
+        params, inverse = np.unique(np.c_[sig, mur, a], axis=0, return_inverse=True)
+        excitation = (np.asarray(f)[..., None],) + tuple(params.T)
+        chi = cached(
+            _excitation_cache,
+            response_cache_size,
+            fcn_ComputeExcitation_FEM,
+            *excitation,
         )
-        Hz = (1 / (4 * np.pi)) * (
-            3 * (Z - z0) * (mx * (X - x0) + my * (Y - y0) + mz * (Z - z0)) / R ** 5
-            - mz / R ** 3
+        chi = chi[..., inverse.ravel()]
+
+        # Kernels of all spheres, the last axis is the sphere
+        ngrid = max(np.ndim(X), np.ndim(Y), np.ndim(Z))
+        X, Y, Z = [np.asarray(v, dtype=float)[..., None] for v in (X, Y, Z)]
+
+        # the response is shaped (*f.shape, *grid.shape)
+        chi = chi.reshape(np.shape(f) + (1,) * ngrid + chi.shape[-1:])
+        geometry = (m, orient, xtx, ytx, ztx, a, x0, y0, z0, X, Y, Z)
+        Gx, Gy, Gz = cached(
+            _kernel_cache, response_cache_size, fcn_ComputeKernel, *geometry
         )
+
+        Hx = np.einsum("...k,...k->...", chi, Gx)
+        Hy = np.einsum("...k,...k->...", chi, Gy)
+        Hz = np.einsum("...k,...k->...", chi, Gz)
         Habs = np.sqrt(
             np.real(Hx) ** 2 + np.real(Hy) ** 2 + np.real(Hz) ** 2
         ) + 1j * np.sqrt(np.imag(Hx) ** 2 + np.imag(Hy) ** 2 + np.imag(Hz) ** 2)
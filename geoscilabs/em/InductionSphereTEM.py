@@ -1,3 +1,5 @@
+from collections import OrderedDict
+
 import numpy as np
 import scipy as sp
 import matplotlib.pyplot as plt
@@ -7,6 +9,8 @@ import matplotlib.patches as patches
 
 from scipy.constants import mu_0
 
+from ._sphere_common import cached, fcn_ComputeCoupling, fcn_ComputeKernel
+
 ##############################################
 #   PLOTTING FUNCTIONS FOR WIDGETS
 ##############################################
@@ -111,14 +115,14 @@ def fcn_TDEM_InductionSphereProfileWidget(
         Bx, By, Bz, Babs = Obj.fcn_ComputeTimeResponse(
             t, sig, mur, a, x0, 0.0, z0, X, 0.0, Z, Type
         )
-        Chi = fcn_ComputeExcitation_TEM(t, sig, mur, a)
+        Chi = fcn_ComputeExcitation_TEM(t, sig, mur, a, Type)
         Ax1 = plotProfileTxRxArrow(Ax1, x0, z0, Chi * Hxt, Chi * Hzt, Type)
         Ax1 = plotProfileXZplane(Ax1, X, Z, Bx, Bz, Flag)
     elif Flag == "dBs/dt":
         Bx, By, Bz, Babs = Obj.fcn_ComputeTimeResponse(
             t, sig, mur, a, x0, 0.0, z0, X, 0.0, Z, Type
         )
-        Chi = fcn_ComputeExcitation_TEM(t, sig, mur, a)
+        Chi = fcn_ComputeExcitation_TEM(t, sig, mur, a, Type)
         Ax1 = plotProfileTxRxArrow(Ax1, x0, z0, Chi * Hxt, Chi * Hzt, Type)
         Ax1 = plotProfileXZplane(Ax1, X, Z, Bx, Bz, Flag)
 
@@ -232,102 +236,95 @@ def fcn_TDEM_InductionSphereProfileEM61Widget(
 ##############################################
 
 
-def fcn_ComputeExcitation_TEM(t, sig, mur, a, Type):
-    """Compute Excitation Factor (TEM)"""
+_eta_cache = OrderedDict()
+eta_cache_size = 16
 
-    beta = np.sqrt(mu_0 * sig) * a
-    N = 2000
-    nvec = np.linspace(1, N, N)
+# Series terms smaller than exp(-series_cutoff) times the first term (or than
+# exp(-series_cutoff) where they are added to 1) are dropped
+series_cutoff = 60.0
 
-    if mur < 1.01:
 
-        chi = np.zeros(np.size(t))
+def fcn_ComputeEta(mur, N=2000):
+    """Roots eta of the series for a permeable sphere, cached per mur"""
 
-        if Type == "b":
+    key = (float(mur), N)
+    if key in _eta_cache:
+        _eta_cache.move_to_end(key)
+        return _eta_cache[key]
 
-            if np.size(t) == 1:
-                SUM_1 = np.sum(np.exp(-((nvec * beta) ** 2) / t))
-                SUM_2 = np.sum(nvec * sp.special.erfc(nvec * beta / np.sqrt(t)))
-                chi = (9 / 2) * (
-                    1 / 3
-                    + t / beta ** 2
-                    - (2 / beta) * np.sqrt(t / np.pi) * (1 + 2 * SUM_1)
-                    + 4 * SUM_2
-                )
+    eta = np.pi * (np.linspace(1, N, N) + 1 / 4)
+    eta0 = np.pi * np.linspace(1, N, N)
 
-            else:
-                for tt in range(0, np.size(t)):
-                    SUM_1 = np.sum(np.exp(-((nvec * beta) ** 2) / t[tt]))
-                    SUM_2 = np.sum(nvec * sp.special.erfc(nvec * beta / np.sqrt(t[tt])))
-                    chi[tt] = (9 / 2) * (
-                        1 / 3
-                        + t[tt] / beta ** 2
-                        - (2 / beta) * np.sqrt(t[tt] / np.pi) * (1 + 2 * SUM_1)
-                        + 4 * SUM_2
-                    )
+    # Converge eta coefficients
+    for pp in range(0, 10):
+        eta = eta0 + np.arctan((mur - 1) * eta / (mur - 1 + eta ** 2))
 
-        elif Type == "dbdt":
-
-            if np.size(t) == 1:
-                SUM = np.sum(np.exp(-((nvec * beta) ** 2) / t))
-                chi = (9 / 2) * (
-                    1 / beta ** 2 - (1 / (beta * np.sqrt(np.pi * t))) * (1 + 2 * SUM)
-                )
+    eta.setflags(write=False)
+    _eta_cache[key] = eta
+    while len(_eta_cache) > eta_cache_size:
+        _eta_cache.popitem(last=False)
+    return eta
 
-            else:
-                for tt in range(0, np.size(t)):
-                    SUM = np.sum(np.exp(-((nvec * beta) ** 2) / t[tt]))
-                    chi[tt] = (9 / 2) * (
-                        1 / beta ** 2
-                        - (1 / (beta * np.sqrt(np.pi * t[tt]))) * (1 + 2 * SUM)
-                    )
 
-    else:
+def fcn_ComputeExcitation_TEM(t, sig, mur, a, Type):
+    """Compute Excitation Factor (TEM)
 
-        N = 2000  # Coefficients
+    The series are summed for all times at once, up to the last term that is
+    not negligible (within exp(-series_cutoff) of the first term, which is
+    always kept) at any of the times and at most N = 2000 terms.
+    """
 
-        eta = np.pi * (np.linspace(1, N, N) + 1 / 4)
-        eta0 = np.pi * np.linspace(1, N, N)
+    beta = np.sqrt(mu_0 * sig) * a
+    N = 2000
+    T = np.atleast_1d(np.asarray(t, dtype=float)).ravel()[:, None]
 
-        # Converge eta coefficients
-        for pp in range(0, 10):
-            eta = eta0 + np.arctan((mur - 1) * eta / (mur - 1 + eta ** 2))
+    if mur < 1.01:
 
-        chi = np.zeros(np.size(t))
+        # terms decay as exp(-(n beta)^2 / t), slowest at the latest time
+        Nt = int(min(N, np.ceil(np.sqrt(series_cutoff * T.max()) / beta) + 1))
+        nvec = np.linspace(1, Nt, Nt)
 
-        # Get Excitation Factor
         if Type == "b":
+            SUM_1 = np.sum(np.exp(-((nvec * beta) ** 2) / T), axis=1)
+            SUM_2 = np.sum(nvec * sp.special.erfc(nvec * beta / np.sqrt(T)), axis=1)
+            T = T[:, 0]
+            chi = (9 / 2) * (
+                1 / 3
+                + T / beta ** 2
+                - (2 / beta) * np.sqrt(T / np.pi) * (1 + 2 * SUM_1)
+                + 4 * SUM_2
+            )
 
-            if np.size(t) == 1:
-                chi = (9 * mur) * np.sum(
-                    np.exp(-t * (eta / beta) ** 2) / ((mur + 2) * (mur - 1) + eta ** 2)
-                )
+        elif Type == "dbdt":
+            SUM = np.sum(np.exp(-((nvec * beta) ** 2) / T), axis=1)
+            T = T[:, 0]
+            chi = (9 / 2) * (
+                1 / beta ** 2 - (1 / (beta * np.sqrt(np.pi * T))) * (1 + 2 * SUM)
+            )
 
-            else:
-                for tt in range(0, np.size(t)):
-                    chi[tt] = (9 * mur) * np.sum(
-                        np.exp(-t[tt] * (eta / beta) ** 2)
-                        / ((mur + 2) * (mur - 1) + eta ** 2)
-                    )
+    else:
 
-        elif Type == "dbdt":
+        eta = fcn_ComputeEta(mur, N)
 
-            if np.size(t) == 1:
-                chi = -(9 * mur) * np.sum(
-                    eta ** 2
-                    * np.exp(-t * (eta / beta) ** 2)
-                    / (beta ** 2 * ((mur + 2) * (mur - 1) + eta ** 2))
-                )
+        # terms decay as exp(-t (eta / beta)^2), relative to the first term
+        # they decay slowest at the earliest time
+        eta2_max = eta[0] ** 2 + series_cutoff * beta ** 2 / T.min()
+        Nt = np.searchsorted(eta ** 2, eta2_max)
+        eta = eta[: max(1, Nt)]
+        x = T * (eta / beta) ** 2
+        decay = np.exp(-x, out=np.zeros_like(x), where=x - x[:, :1] < series_cutoff)
+
+        # Get Excitation Factor
+        if Type == "b":
+            chi = (9 * mur) * np.sum(decay / ((mur + 2) * (mur - 1) + eta ** 2), axis=1)
 
-            else:
-                for tt in range(0, np.size(t)):
-                    chi[tt] = -(9 * mur) * np.sum(
-                        eta ** 2
-                        * np.exp(-t[tt] * (eta / beta) ** 2)
-                        / (beta ** 2 * ((mur + 2) * (mur - 1) + eta ** 2))
-                    )
+        elif Type == "dbdt":
+            chi = -(9 * mur) * np.sum(
+                eta ** 2 * decay / (beta ** 2 * ((mur + 2) * (mur - 1) + eta ** 2)),
+                axis=1,
+            )
 
-    return chi
+    return chi.reshape(np.shape(t))[()]
 
 
 def fcn_ComputePrimary(m, orient, xtx, ytx, ztx, X, Y, Z):
@@ -351,6 +348,13 @@ def fcn_ComputePrimary(m, orient, xtx, ytx, ztx, X, Y, Z):
     return Hpx, Hpy, Hpz
 
 
+# The response is the excitation factor, which depends on (t, sig, mur, a,
+# Type), times the kernel, which depends on the geometry; both are cached
+_excitation_cache = OrderedDict()
+_kernel_cache = OrderedDict()
+response_cache_size = 16
+
+
 ##############################################
 #   GLOBAL PLOTTING FUNTIONS
 ##############################################
@@ -658,26 +662,100 @@ class SphereTEM:
         ytx = self.ytx
         ztx = self.ztx
 
-        chi = fcn_ComputeExcitation_TEM(t, sig, mur, a, Type)
-        Hpx, Hpy, Hpz = fcn_ComputePrimary(m, orient, xtx, ytx, ztx, x0, y0, z0)
+        excitation = (t, sig, mur, a, Type)
+        geometry = (m, orient, xtx, ytx, ztx, a, x0, y0, z0, X, Y, Z)
+        chi = cached(
+            _excitation_cache,
+            response_cache_size,
+            fcn_ComputeExcitation_TEM,
+            *excitation,
+        )
+        Gx, Gy, Gz = cached(
+            _kernel_cache, response_cache_size, fcn_ComputeKernel, *geometry
+        )
 
-        mx = 4 * np.pi * a ** 3 * chi * Hpx / 3
-        my = 4 * np.pi * a ** 3 * chi * Hpy / 3
-        mz = 4 * np.pi * a ** 3 * chi * Hpz / 3
-        R = np.sqrt((X - x0) ** 2 + (Y - y0) ** 2 + (Z - z0) ** 2)
+        Hx = chi * Gx
+        Hy = chi * Gy
+        Hz = chi * Gz
+        Habs = np.sqrt(Hx ** 2 + Hy ** 2 + Hz ** 2)
 
-        Hx = (1 / (4 * np.pi)) * (
-            3 * (X - x0) * (mx * (X - x0) + my * (Y - y0) + mz * (Z - z0)) / R ** 5
-            - mx / R ** 3
+        Bx = mu_0 * Hx
+        By = mu_0 * Hy
+        Bz = mu_0 * Hz
+        Babs = mu_0 * Habs
+
+        return Bx, By, Bz, Babs
+
+
+class SphereCollectionTEM:
+    """Superposed response of many spheres, ignoring their mutual coupling
+    Input variables:
+
+        sig, mur, a, x0, y0, z0: arrays (or scalars) of the sphere
+        conductivities, relative permeabilities, radii and centres
+
+        Output variables:
+    """
+
+    def __init__(self, m, orient, xtx, ytx, ztx):
+        """Defines Initial Attributes"""
+
+        self.m = m
+        self.orient = orient
+        self.xtx = xtx
+        self.ytx = ytx
+        self.ztx = ztx
+
+    ############################################
+    #   DEFINE METHODS
+
+    def fcn_ComputeTimeResponse(self, t, sig, mur, a, x0, y0, z0, X, Y, Z, Type):
+        """Compute Time Response of All Spheres at (X,Y,Z) in T or T/s"""
+
+        m = self.m
+        orient = self.orient
+        xtx = self.xtx
+        ytx = self.ytx
+        ztx = self.ztx
+
+        sig, mur, a, x0, y0, z0 = np.broadcast_arrays(
+            *np.atleast_1d(sig, mur, a, x0, y0, z0)
         )
-        Hy = (1 / (4 * np.pi)) * (
-            3 * (Y - y0) * (mx * (X - x0) + my * (Y - y0) + mz * (Z - z0)) / R ** 5
-            - my / R ** 3
+
+        # Excitation factors of the unique (sig, mur, a), for all times at once
+        params, inverse = np.unique(np.c_[sig, mur, a], axis=0, return_inverse=True)
+        chi = np.stack(
+            [
+                cached(
+                    _excitation_cache,
+                    response_cache_size,
+                    fcn_ComputeExcitation_TEM,
+                    t,
+                    s,
+                    mu,
+                    r,
+                    Type,
+                )
+                for s, mu, r in params
+            ],
+            axis=-1,
         )
-        Hz = (1 / (4 * np.pi)) * (
-            3 * (Z - z0) * (mx * (X - x0) + my * (Y - y0) + mz * (Z - z0)) / R ** 5
-            - mz / R ** 3
+        chi = chi[..., inverse.ravel()]
+
+        # Kernels of all spheres, the last axis is the sphere
+        ngrid = max(np.ndim(X), np.ndim(Y), np.ndim(Z))
+        X, Y, Z = [np.asarray(v, dtype=float)[..., None] for v in (X, Y, Z)]
+
+        # the response is shaped (*t.shape, *grid.shape)
+        chi = chi.reshape(np.shape(t) + (1,) * ngrid + chi.shape[-1:])
+        geometry = (m, orient, xtx, ytx, ztx, a, x0, y0, z0, X, Y, Z)
+        Gx, Gy, Gz = cached(
+            _kernel_cache, response_cache_size, fcn_ComputeKernel, *geometry
         )
+
+        Hx = np.einsum("...k,...k->...", chi, Gx)
+        Hy = np.einsum("...k,...k->...", chi, Gy)
+        Hz = np.einsum("...k,...k->...", chi, Gz)
         Habs = np.sqrt(Hx ** 2 + Hy ** 2 + Hz ** 2)
 
         Bx = mu_0 * Hx
@@ -1,3 +1,8 @@
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import warnings
+
 from scipy.constants import epsilon_0, mu_0
 import matplotlib.pyplot as plt
 import numpy as np
@@ -407,52 +412,256 @@ def PlotConfiguration(thick, sig, eps, mu, ax, widthg, z):
     return ax
 
 
-# Propagate Up and Down component for a certain frequency & evaluate E and H field
+# Cole-Cole conductivity, wavenumber and impedance of every layer, for all
+# frequencies at once (arrays of shape (nfreq, n+1), layer 0 is the air)
+def LayerProps(F, sig, chg, taux, c, mu, eps):
 
+    F = np.atleast_1d(F)[:, None]
+    sigcm = np.zeros((F.shape[0], len(sig)), dtype=complex)
+    sigcm[:, 1:] = PCC(sig[1:], chg[1:], taux[1:], c[1:], F)
 
-def Propagate(f, H, sig, chg, taux, c, mu, eps, n):
+    K = k(mu, sigcm, eps, F)
+    Z = ImpZ(F, mu, K)
 
-    sigcm = np.zeros_like(sig, dtype="complex_")
+    return K, Z
 
-    for j in range(1, len(sig)):
-        sigcm[j] = PCC(sig[j], chg[j], taux[j], c[j], f)
 
-    K = k(mu, sigcm, eps, f)
-    Z = ImpZ(f, mu, K)
+# Propagate Up and Down components for all frequencies at once & evaluate E and H
+# fields. UD and EH have shape (nfreq, 2, n+1), Z and K (nfreq, n+1)
+def PropagateFreqs(F, H, sig, chg, taux, c, mu, eps, n):
 
-    EH = np.matrix(np.zeros((2, n + 1), dtype="complex_"), dtype="complex_")
-    UD = np.matrix(np.zeros((2, n + 1), dtype="complex_"), dtype="complex_")
+    K, Z = LayerProps(F, sig, chg, taux, c, mu, eps)
 
-    UD[1, -1] = 1.0
+    UD = np.zeros((K.shape[0], 2, n + 1), dtype=complex)
+    UD[:, 1, -1] = 1.0
 
     for i in range(-2, -(n + 2), -1):
 
-        UD[:, i] = Tinv(H[i + 1], K[i]) * Pinv(Z[i]) * P(Z[i + 1]) * UD[:, i + 1]
-        UD = UD / ((np.abs(UD[0, :] + UD[1, :])).max())
+        # Tinv(H[i+1], K[i]) * Pinv(Z[i]) * P(Z[i+1]) applied to all frequencies
+        ratio = Z[:, i] / Z[:, i + 1]
+        a = (1.0 + ratio) / 2.0
+        b = (1.0 - ratio) / 2.0
+        U, D = UD[:, 0, i + 1], UD[:, 1, i + 1]
+        UD[:, 0, i] = np.exp(-1j * K[:, i] * H[i + 1]) * (a * U + b * D)
+        UD[:, 1, i] = np.exp(1j * K[:, i] * H[i + 1]) * (b * U + a * D)
+        UD = UD / (np.abs(UD[:, 0, :] + UD[:, 1, :])).max(axis=1)[:, None, None]
 
-    for j in range(0, n + 1):
-        EH[:, j] = np.matrix([[1.0, 1], [-1.0 / Z[j], 1.0 / Z[j]]]) * UD[:, j]
+    EH = np.stack([UD[:, 0] + UD[:, 1], (UD[:, 1] - UD[:, 0]) / Z], axis=1)
 
     return UD, EH, Z, K
 
 
+# Propagate Up and Down component for a certain frequency & evaluate E and H field
+def Propagate(f, H, sig, chg, taux, c, mu, eps, n):
+
+    UD, EH, Z, K = PropagateFreqs(np.r_[f], H, sig, chg, taux, c, mu, eps, n)
+
+    return np.matrix(UD[0]), np.matrix(EH[0]), Z[0], K[0]
+
+
+# Surface impedance E/H for all frequencies from the recursion of the layer
+# impedances, starting from the intrinsic impedance of the bottom half-space
+def AppImpZ(F, H, sig, chg, taux, c, mu, eps, n):
+
+    K, Z = LayerProps(F, sig, chg, taux, c, mu, eps)
+
+    Zin = Z[:, n]
+    for j in range(n - 1, 0, -1):
+        r = (Zin - Z[:, j]) / (Zin + Z[:, j]) * np.exp(-2j * K[:, j] * H[j])
+        Zin = Z[:, j] * (1.0 + r) / (1.0 - r)
+
+    return Zin
+
+
 # Evaluate the apparent resistivity and phase for a frequency range
 def appres(F, H, sig, chg, taux, c, mu, eps, n):
 
-    Res = np.zeros_like(F)
-    Phase = np.zeros_like(F)
-    App_ImpZ = np.zeros_like(F, dtype="complex_")
+    App_ImpZ = AppImpZ(F, H, sig, chg, taux, c, mu, eps, n)
+
+    Res = np.abs(App_ImpZ) ** 2.0 / (mu_0 * omega(F))
+    Phase = np.angle(App_ImpZ, deg=True)
 
-    for i in range(0, len(F)):
+    return Res, Phase
 
-        UD, EH, Z, K = Propagate(F[i], H, sig, chg, taux, c, mu, eps, n)
 
-        App_ImpZ[i] = EH[0, 1] / EH[1, 1]
+# Surface impedance and its derivatives with respect to the log-conductivity of
+# layers 1..n (no chargeability), by differentiating the impedance recursion
+def AppImpZDeriv(F, H, sig, mu, eps, n):
 
-        Res[i] = np.abs(App_ImpZ[i]) ** 2.0 / (mu_0 * omega(F[i]))
-        Phase[i] = np.angle(App_ImpZ[i], deg=True)
+    zero = np.zeros_like(sig)
+    K, Z = LayerProps(F, sig, zero, zero, np.ones_like(sig), mu, eps)
+    w = omega(np.atleast_1d(F))[:, None]
 
-    return Res, Phase
+    # d/dln(sig) of the wavenumber and impedance of each layer
+    dK = sig * (-1j * mu * mu_0 * w) / (2.0 * K)
+    dZ = -Z / K * dK
+
+    Zin = Z[:, n]
+    dZin = np.zeros((K.shape[0], n), dtype=complex)
+    dZin[:, n - 1] = dZ[:, n]
+    for j in range(n - 1, 0, -1):
+        den = Zin + Z[:, j]
+        g = (Zin - Z[:, j]) / den
+        e = np.exp(-2j * K[:, j] * H[j])
+        r = g * e
+
+        dr = e[:, None] * 2.0 * Z[:, j, None] / den[:, None] ** 2 * dZin
+        dr[:, j - 1] += (
+            -e * 2.0 * Zin / den ** 2 * dZ[:, j] - 2j * H[j] * r * dK[:, j]
+        )
+
+        dZin = Z[:, j, None] * 2.0 / (1.0 - r[:, None]) ** 2 * dr
+        dZin[:, j - 1] += (1.0 + r) / (1.0 - r) * dZ[:, j]
+        Zin = Z[:, j] * (1.0 + r) / (1.0 - r)
+
+    return Zin, dZin
+
+
+# Apparent resistivity and phase with the sensitivity of [log10(Res), Phase]
+# to the log-conductivity of layers 1..n
+def appresDeriv(F, H, sig, mu, eps, n):
+
+    App_ImpZ, dApp_ImpZ = AppImpZDeriv(F, H, sig, mu, eps, n)
+
+    Res = np.abs(App_ImpZ) ** 2.0 / (mu_0 * omega(F))
+    Phase = np.angle(App_ImpZ, deg=True)
+
+    dlnZ = dApp_ImpZ / App_ImpZ[:, None]
+    J = np.vstack([2.0 * dlnZ.real / np.log(10.0), np.rad2deg(dlnZ.imag)])
+
+    return Res, Phase, J
+
+
+def _invert_mt1d_sounding(
+    app_res,
+    phase,
+    F,
+    H,
+    mu,
+    eps,
+    sig0,
+    std_res,
+    std_phase,
+    alpha_s,
+    beta0,
+    beta_cooling,
+    maxiter,
+):
+
+    n = len(H)
+    nf = len(F)
+    dobs = np.r_[np.log10(app_res), phase]
+    Wd = 1.0 / np.r_[np.ones(nf) * std_res / np.log(10.0), np.ones(nf) * std_phase]
+
+    # first-order smoothness plus a small reference-model term
+    Wm = np.vstack([np.diff(np.eye(n), axis=0), np.sqrt(alpha_s) * np.eye(n)])
+    WtW = Wm.T @ Wm
+
+    if sig0 is None:
+        sig0 = np.r_[0.0, np.ones(n) / np.exp(np.mean(np.log(app_res)))]
+    mref = np.log(sig0[1:])
+    m = mref.copy()
+
+    def forward(m):
+        Res, Phase, J = appresDeriv(F, H, np.r_[0.0, np.exp(m)], mu, eps, n)
+        return np.r_[np.log10(Res), Phase], J
+
+    def objective(d, m, beta):
+        phid = np.sum((Wd * (d - dobs)) ** 2)
+        return phid, phid + beta * (m - mref) @ WtW @ (m - mref)
+
+    d, J = forward(m)
+    WJ = Wd[:, None] * J
+    beta = beta0
+    if beta is None:
+        beta = np.trace(WJ.T @ WJ) / np.trace(WtW)
+
+    target = 2 * nf
+    for it in range(maxiter):
+        phid, phi = objective(d, m, beta)
+        if phid <= target:
+            break
+
+        WJ = Wd[:, None] * J
+        g = WJ.T @ (Wd * (dobs - d)) - beta * WtW @ (m - mref)
+        dm = np.linalg.solve(WJ.T @ WJ + beta * WtW, g)
+
+        # halve the Gauss-Newton step until the objective decreases, keep the
+        # model and stop if no step does
+        step = 1.0
+        while step > 1e-3:
+            d_try, J_try = forward(m + step * dm)
+            if objective(d_try, m + step * dm, beta)[1] < phi:
+                break
+            step /= 2.0
+        else:
+            break
+        m, d, J = m + step * dm, d_try, J_try
+        beta /= beta_cooling
+
+    phid = objective(d, m, beta)[0]
+    if phid > target:
+        warnings.warn(
+            "The MT1D inversion did not converge, it stopped at a misfit of "
+            "{:.3g} above the target {:d}".format(phid, target)
+        )
+    return np.r_[0.0, np.exp(m)], 10.0 ** d[:nf], d[nf:], phid
+
+
+# 1D inversion of apparent resistivity and phase curves for the conductivity of
+# layers with fixed thicknesses H (same layout as for appres, layer 0 is the
+# air), using damped Gauss-Newton iterations with a cooled smoothness trade-off
+# (Occam style) until the misfit reaches the number of data. app_res and phase
+# of shape (nsounding, nfreq) are inverted independently over n_jobs processes.
+def invert_mt1d(
+    F,
+    H,
+    app_res,
+    phase,
+    mu=None,
+    eps=None,
+    sig0=None,
+    std_res=0.05,
+    std_phase=2.0,
+    alpha_s=1e-4,
+    beta0=None,
+    beta_cooling=2.0,
+    maxiter=20,
+    n_jobs=1,
+):
+
+    n = len(H)
+    if mu is None:
+        mu = np.ones(n + 1)
+    if eps is None:
+        eps = np.ones(n + 1)
+
+    invert = partial(
+        _invert_mt1d_sounding,
+        F=F,
+        H=H,
+        mu=mu,
+        eps=eps,
+        sig0=sig0,
+        std_res=std_res,
+        std_phase=std_phase,
+        alpha_s=alpha_s,
+        beta0=beta0,
+        beta_cooling=beta_cooling,
+        maxiter=maxiter,
+    )
+
+    app_res, phase = np.asarray(app_res), np.asarray(phase)
+    if app_res.ndim == 1:
+        return invert(app_res, phase)
+
+    if n_jobs == 1:
+        results = list(map(invert, app_res, phase))
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            results = list(pool.map(invert, app_res, phase))
+
+    return tuple(np.array(r) for r in zip(*results))
 
 
 # Evaluate Up, Down components, E and H field, for a frequency range,
@@ -463,53 +672,57 @@ def calculateEHzt(F, H, sig, chg, taux, c, mu, eps, n, zsample, tsample):
 
     layer = np.zeros(len(zsample), dtype=int) - 1
 
-    Exzt = np.matrix(
-        np.zeros((len(zsample), len(tsample)), dtype="complex_"), dtype="complex_"
-    )
-    Hyzt = np.matrix(
-        np.zeros((len(zsample), len(tsample)), dtype="complex_"), dtype="complex_"
-    )
-    Uz = np.matrix(
-        np.zeros((len(zsample), len(tsample)), dtype="complex_"), dtype="complex_"
-    )
-    Dz = np.matrix(
-        np.zeros((len(zsample), len(tsample)), dtype="complex_"), dtype="complex_"
-    )
-    UDaux = np.matrix(np.zeros((2, len(zsample)), dtype="complex_"), dtype="complex_")
-
     for i in range(0, n + 1, 1):
         layer = layer + (zsample >= topc[i]) * 1
 
-    for j in range(0, len(F)):
+    UD, EH, Z, K = PropagateFreqs(F, H, sig, chg, taux, c, mu, eps, n)
 
-        UD, EH, Z, K = Propagate(F[j], H, sig, chg, taux, c, mu, eps, n)
+    # Up and Down components at every depth for every frequency (nfreq, nz)
+    Kz = K[:, layer]
+    Uf = UD[:, 0, layer] * np.exp(1j * Kz * (zsample - topc[layer]))
+    Df = UD[:, 1, layer] * np.exp(-1j * Kz * (zsample - topc[layer]))
 
-        for p in range(0, len(zsample)):
+    # time variation exp(i omega t) of every frequency, averaged over frequencies
+    EXPT = np.exp(1j * omega(np.atleast_1d(F))[:, None] * tsample) / len(F)
 
-            UDaux[:, p] = UD_Z(UD[:, layer[p]], zsample[p], topc[layer[p]], K[layer[p]])
+    Uz = np.matrix(Uf.T @ EXPT)
+    Dz = np.matrix(Df.T @ EXPT)
+    Exzt = Uz + Dz
+    Hyzt = np.matrix(((Df - Uf) / Z[:, layer]).T @ EXPT)
+    UDaux = np.matrix(np.stack([Uf[-1], Df[-1]]))
 
-            for q in range(0, len(tsample)):
+    return Exzt, Hyzt, Uz, Dz, UDaux, layer
 
-                Exzt[p, q] = Exzt[p, q] + E_ZT(
-                    UDaux[0, p], UDaux[1, p], F[j], tsample[q]
-                ) / len(F)
-                Hyzt[p, q] = Hyzt[p, q] + H_ZT(
-                    UDaux[0, p], UDaux[1, p], Z[layer[p]], F[j], tsample[q]
-                ) / len(F)
-                Uz[p, q] = Uz[p, q] + UDaux[0, p] * np.exp(
-                    1j * omega(F[j]) * tsample[q]
-                ) / len(F)
-                Dz[p, q] = Dz[p, q] + UDaux[1, p] * np.exp(
-                    1j * omega(F[j]) * tsample[q]
-                ) / len(F)
 
-    return Exzt, Hyzt, Uz, Dz, UDaux, layer
+# LRU of the apparent resistivity curves and envelope fields of the layer
+# models seen by PlotAppRes, keyed on the parameters rounded to 10 significant
+# digits, so that envelope-only changes do not recompute the responses
+_response_cache = OrderedDict()
+response_cache_size = 32
+
+
+def _round_key(*args):
+    return tuple(tuple(float("%.10g" % v) for v in np.ravel(a)) for a in args)
+
+
+def _cached_response(key, func, *args):
+
+    if key in _response_cache:
+        _response_cache.move_to_end(key)
+        return _response_cache[key]
+
+    val = func(*args)
+    _response_cache[key] = val
+    while len(_response_cache) > response_cache_size:
+        _response_cache.popitem(last=False)
+    return val
 
 
 # Function to Plot Apparent Resistivity and Phase
 def PlotAppRes(F, H, sig, chg, taux, c, mu, eps, n, fenvelope, PlotEnvelope):
 
-    Res, Phase = appres(F, H, sig, chg, taux, c, mu, eps, n)
+    model = (F, H, sig, chg, taux, c, mu, eps, n)
+    Res, Phase = _cached_response(("appres",) + _round_key(*model), appres, *model)
 
     figwdith = 18
     figheight = 12
@@ -577,8 +790,21 @@ def PlotAppRes(F, H, sig, chg, taux, c, mu, eps, n, fenvelope, PlotEnvelope):
         )
 
         tc = np.arange(0.0, 1.0 / fenvelope, 0.01 / (fenvelope))
-        Exzt, Hyzt, Uz, Dz, UDaux, layer = calculateEHzt(
-            np.array([fenvelope]), H, sig, chg, taux, c, mu, eps, n, zc, tc
+        # zc and tc only depend on H, n and fenvelope
+        Exzt, Hyzt, Uz, Dz, UDaux, layer = _cached_response(
+            ("envelope",) + _round_key(*model[1:], fenvelope),
+            calculateEHzt,
+            np.array([fenvelope]),
+            H,
+            sig,
+            chg,
+            taux,
+            c,
+            mu,
+            eps,
+            n,
+            zc,
+            tc,
         )
 
         axH = ax[2].twiny()
@@ -1,3 +1,9 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import numpy as np
 import matplotlib.pyplot as plt  # Matplotlib
 from matplotlib import rcParams  # To adjust some plot settings
@@ -101,6 +107,69 @@ def csem_layered_earth(
     """
     Simulating CSEM response in a layered earth
     """
+    return csem_layered_earth_batch(
+        [
+            dict(
+                srcloc=srcloc,
+                rxlocs=rxlocs,
+                depth=depth,
+                res=res,
+                aniso=aniso,
+                frequency=frequency,
+                nlayers=nlayers,
+                src_type=src_type,
+                rx_type=rx_type,
+                src_direction=src_direction,
+                rx_direction=rx_direction,
+                verb=verb,
+            )
+        ]
+    )[0]
+
+
+# Memo of the layered-earth responses at a single frequency, keyed by a hash
+# of the model and survey, so that toggling between components or between the
+# canonical and target models does not call empymod again
+_response_cache = OrderedDict()
+response_cache_size = 256
+
+_request_defaults = dict(
+    nlayers=5,
+    src_type="electric",
+    rx_type="electric",
+    src_direction="x",
+    rx_direction="x",
+    verb=0,
+)
+
+
+def _model_hash(request):
+    h = hashlib.sha1()
+    for name in sorted(request):
+        value = request[name]
+        h.update(name.encode())
+        if isinstance(value, str):
+            h.update(value.encode())
+        else:
+            value = np.asarray(value, dtype=float)
+            h.update(str(value.shape).encode())
+            h.update(value.tobytes())
+    return h.hexdigest()
+
+
+def _bipole_input(
+    srcloc,
+    rxlocs,
+    depth,
+    res,
+    aniso,
+    nlayers,
+    src_type,
+    rx_type,
+    src_direction,
+    rx_direction,
+    verb,
+):
     # Safety checks
     if len(depth) != nlayers - 1:
         raise Exception("Length of depth should be nlayers-1")
@@ -140,15 +209,152 @@ def csem_layered_earth(
         "src": src,
         "rec": rx,
         "depth": depth,
-        "freqtime": frequency,
         "aniso": aniso,
         "verb": verb,
         "xdirect": xdirect,
         "mrec": "electric" != rx_type,
         "msrc": "electric" != src_type,
     }
-    out = bipole(**inpdat)
-    return utils.EMArray(out)
+    return inpdat
+
+
+def csem_layered_earth_batch(requests):
+    """
+    Simulating CSEM responses for a list of requests, each a dict with the
+    arguments of csem_layered_earth. Requests that only differ in frequency
+    are grouped into a single empymod call, and responses are memoized by
+    model hash.
+    """
+    groups = OrderedDict()
+    keys = []
+    values = {}
+    for request in requests:
+        request = dict(_request_defaults, **request)
+        frequency = np.atleast_1d(np.asarray(request.pop("frequency"), dtype=float))
+        verb = request.pop("verb")
+        model = _model_hash(request)
+
+        keys.append([(model, f) for f in frequency.tolist()])
+        for key in keys[-1]:
+            if key in values:
+                continue
+            if key in _response_cache:
+                _response_cache.move_to_end(key)
+                values[key] = _response_cache[key]
+            else:
+                groups.setdefault(model, (request, verb, set()))[2].add(key[1])
+
+    for model, (request, verb, frequency) in groups.items():
+        frequency = sorted(frequency)
+        inpdat = _bipole_input(verb=verb, **request)
+        inpdat["freqtime"] = frequency
+        out = np.asarray(bipole(**inpdat)).reshape(len(frequency), -1)
+        for f, val in zip(frequency, out):
+            values[(model, f)] = _response_cache[(model, f)] = val
+
+    while len(_response_cache) > response_cache_size:
+        _response_cache.popitem(last=False)
+
+    return [utils.EMArray(np.squeeze([values[key] for key in k])) for k in keys]
+
+
+def _simulate_chunk(model, srclocs, rxlocs, frequency, options):
+    return np.array(
+        [
+            np.reshape(
+                csem_layered_earth(
+                    srcloc, rxlocs, frequency=frequency, **model, **options
+                ),
+                (len(frequency), len(rxlocs)),
+            )
+            for srcloc in srclocs
+        ]
+    )
+
+
+def _write_manifest(fname, manifest):
+    with open(fname + ".tmp", "w") as f:
+        json.dump(manifest, f)
+    os.replace(fname + ".tmp", fname)
+
+
+def simulate_csem_survey(
+    fname, srclocs, rxlocs, models, frequency, chunk_size=50, n_jobs=1, **kwargs
+):
+    """
+    Simulating CSEM responses of a survey with many source (tow) positions,
+    frequencies and layered-earth models
+
+    The responses are written to the .npy file fname as a complex array of
+    shape (nmodel, nsrc, nfreq, nrx), in chunks of chunk_size source
+    positions evaluated over n_jobs processes. models is a list of dicts with
+    depth, res and aniso, and kwargs are passed on to csem_layered_earth.
+    Completed chunks are recorded in the manifest fname + ".json", so that
+    an interrupted run resumes where it stopped when called again with the
+    same arguments. Returns the responses as a read-only memmap.
+    """
+    srclocs = np.atleast_2d(srclocs)
+    rxlocs = np.atleast_2d(rxlocs)
+    frequency = np.atleast_1d(np.asarray(frequency, dtype=float))
+    shape = (len(models), len(srclocs), len(frequency), len(rxlocs))
+
+    survey = dict(
+        srclocs=srclocs, rxlocs=rxlocs, frequency=frequency, chunk_size=chunk_size
+    )
+    for i, model in enumerate(models):
+        survey.update({"%s_%d" % (name, i): model[name] for name in model})
+    survey.update(kwargs)
+    key = _model_hash(survey)
+
+    chunks = [
+        (imodel, start)
+        for imodel in range(len(models))
+        for start in range(0, len(srclocs), chunk_size)
+    ]
+
+    manifest_name = fname + ".json"
+    done = set()
+    if os.path.exists(fname) and os.path.exists(manifest_name):
+        with open(manifest_name) as f:
+            manifest = json.load(f)
+        if manifest["key"] == key:
+            done = set(manifest["done"])
+
+    if done:
+        data = np.lib.format.open_memmap(fname, mode="r+")
+    else:
+        data = np.lib.format.open_memmap(fname, mode="w+", dtype=complex, shape=shape)
+        _write_manifest(manifest_name, dict(key=key, shape=shape, done=[]))
+
+    def task(ichunk):
+        imodel, start = chunks[ichunk]
+        return (
+            models[imodel],
+            srclocs[start : start + chunk_size],
+            rxlocs,
+            frequency,
+            kwargs,
+        )
+
+    def write(ichunk, val):
+        imodel, start = chunks[ichunk]
+        data[imodel, start : start + len(val)] = val
+        data.flush()
+        done.add(ichunk)
+        _write_manifest(manifest_name, dict(key=key, shape=shape, done=sorted(done)))
+
+    todo = [ichunk for ichunk in range(len(chunks)) if ichunk not in done]
+    if n_jobs == 1:
+        for ichunk in todo:
+            write(ichunk, _simulate_chunk(*task(ichunk)))
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            futures = {pool.submit(_simulate_chunk, *task(i)): i for i in todo}
+            for future in as_completed(futures):
+                write(futures[future], future.result())
+
+    del data
+    return np.load(fname, mmap_mode="r")
 
 
 def viz_plane(
@@ -251,6 +457,46 @@ def viz_plane(
     return out
 
 
+_plane_components = {
+    "XZ": [("ex", "electric", "x"), ("ez", "electric", "z"), ("hy", "magnetic", "y")],
+    "YZ": [("ex", "electric", "x"), ("hy", "magnetic", "y"), ("hz", "magnetic", "z")],
+}
+
+
+def csem_plane_fields(srcloc, depth, res, aniso, frequency, plane, h, z):
+    """
+    Complex field components on the grid of horizontal positions h and depths
+    z in the XZ or YZ plane through the source, as a dict of EMArrays. The
+    components are memoized by csem_layered_earth_batch, so changing the
+    plotted field or colour scale reuses the same evaluation.
+    """
+    if plane == "XZ":
+        X, Y, Z = np.meshgrid(h, np.r_[0.0], z)
+    elif plane == "YZ":
+        X, Y, Z = np.meshgrid(np.r_[0.0], h, z)
+    else:
+        raise Exception("plane should be XZ or YZ")
+    rxlocs = np.c_[X.flatten(), Y.flatten(), Z.flatten()]
+
+    components = _plane_components[plane]
+    values = csem_layered_earth_batch(
+        [
+            dict(
+                srcloc=srcloc,
+                rxlocs=rxlocs,
+                depth=depth,
+                res=res,
+                aniso=aniso,
+                frequency=frequency,
+                rx_type=rx_type,
+                rx_direction=rx_direction,
+            )
+            for _, rx_type, rx_direction in components
+        ]
+    )
+    return {name: val for (name, _, _), val in zip(components, values)}
+
+
 def csem_fields_app(
     frequency,
     zsrc,
@@ -308,24 +554,8 @@ def csem_fields_app(
     srcloc = np.r_[0.0, 0.0, -zsrc]
 
     if Plane == "XZ":
-        X, Y, Z = np.meshgrid(x, np.r_[0.0], z)
-        rxlocs = np.c_[X.flatten(), Y.flatten(), Z.flatten()]
-        ex = csem_layered_earth(
-            srcloc, rxlocs, depth, res, aniso, frequency, rx_direction="x"
-        )
-        ez = csem_layered_earth(
-            srcloc, rxlocs, depth, res, aniso, frequency, rx_direction="z"
-        )
-        hy = csem_layered_earth(
-            srcloc,
-            rxlocs,
-            depth,
-            res,
-            aniso,
-            frequency,
-            rx_direction="y",
-            rx_type="magnetic",
-        )
+        fields = csem_plane_fields(srcloc, depth, res, aniso, frequency, Plane, x, z)
+        ex, ez, hy = fields["ex"], fields["ez"], fields["hy"]
         x0, x1 = x.copy(), z.copy()
         xlabel = "X (m)"
         if Field == "E":
@@ -341,31 +571,8 @@ def csem_fields_app(
             val0, val1 = sx.copy(), sz.copy()
 
     elif Plane == "YZ":
-        X, Y, Z = np.meshgrid(np.r_[0.0], y, z)
-        rxlocs = np.c_[X.flatten(), Y.flatten(), Z.flatten()]
-        ex = csem_layered_earth(
-            srcloc, rxlocs, depth, res, aniso, frequency, rx_direction="x"
-        )
-        hy = csem_layered_earth(
-            srcloc,
-            rxlocs,
-            depth,
-            res,
-            aniso,
-            frequency,
-            rx_direction="y",
-            rx_type="magnetic",
-        )
-        hz = csem_layered_earth(
-            srcloc,
-            rxlocs,
-            depth,
-            res,
-            aniso,
-            frequency,
-            rx_direction="z",
-            rx_type="magnetic",
-        )
+        fields = csem_plane_fields(srcloc, depth, res, aniso, frequency, Plane, y, z)
+        ex, hy, hz = fields["ex"], fields["hy"], fields["hz"]
         x0, x1 = y.copy(), z.copy()
         xlabel = "Y (m)"
         if Field == "E":
@@ -379,22 +586,6 @@ def csem_fields_app(
             sz = 0.5 * (ex * hy.conj()).real
             val0, val1 = sy.copy(), sz.copy()
 
-    ex = csem_layered_earth(
-        srcloc, rxlocs, depth, res, aniso, frequency, rx_direction="x"
-    )
-    ez = csem_layered_earth(
-        srcloc, rxlocs, depth, res, aniso, frequency, rx_direction="z"
-    )
-    hy = csem_layered_earth(
-        srcloc,
-        rxlocs,
-        depth,
-        res,
-        aniso,
-        frequency,
-        rx_direction="y",
-        rx_type="magnetic",
-    )
     if Fixed:
         clim = (np.log10(vmin), np.log10(vmax))
     else:
@@ -521,71 +712,50 @@ def csem_data_app(
         xlabel = "Y offset (m)"
         # x0 = x.copy()
 
+    model = dict(
+        srcloc=srcloc,
+        rxlocs=rxlocs,
+        depth=depth,
+        res=res,
+        aniso=aniso,
+        frequency=frequency,
+    )
+    model_bg = dict(
+        srcloc=srcloc,
+        rxlocs=rxlocs,
+        depth=depth_bg,
+        res=res_bg,
+        aniso=aniso_bg,
+        frequency=frequency_bg,
+    )
+
     if Field == "E":
         label = "Electric field (V/m)"
-        data = csem_layered_earth(
-            srcloc, rxlocs, depth, res, aniso, frequency, rx_direction=Component
-        )
-        data_bg = csem_layered_earth(
-            srcloc,
-            rxlocs,
-            depth_bg,
-            res_bg,
-            aniso_bg,
-            frequency_bg,
-            rx_direction=Component,
+        data, data_bg = csem_layered_earth_batch(
+            [
+                dict(model, rx_direction=Component),
+                dict(model_bg, rx_direction=Component),
+            ]
         )
 
     elif Field == "H":
         label = "Magnetic field (A/m)"
-        data = csem_layered_earth(
-            srcloc,
-            rxlocs,
-            depth,
-            res,
-            aniso,
-            frequency,
-            rx_direction=Component,
-            rx_type="magnetic",
-        )
-        data_bg = csem_layered_earth(
-            srcloc,
-            rxlocs,
-            depth_bg,
-            res_bg,
-            aniso_bg,
-            frequency_bg,
-            rx_direction=Component,
-            rx_type="magnetic",
+        data, data_bg = csem_layered_earth_batch(
+            [
+                dict(model, rx_direction=Component, rx_type="magnetic"),
+                dict(model_bg, rx_direction=Component, rx_type="magnetic"),
+            ]
         )
 
     elif Field == "Zxy":
         label = "Impedance (V/A)"
-        data_ex = csem_layered_earth(
-            srcloc, rxlocs, depth, res, aniso, frequency, rx_direction="x"
-        )
-        data_ex_bg = csem_layered_earth(
-            srcloc, rxlocs, depth_bg, res_bg, aniso_bg, frequency_bg, rx_direction="x"
-        )
-        data_hy = csem_layered_earth(
-            srcloc,
-            rxlocs,
-            depth_bg,
-            res_bg,
-            aniso_bg,
-            frequency_bg,
-            rx_direction="y",
-            rx_type="magnetic",
-        )
-        data_hy_bg = csem_layered_earth(
-            srcloc,
-            rxlocs,
-            depth_bg,
-            res_bg,
-            aniso_bg,
-            frequency_bg,
-            rx_direction="y",
-            rx_type="magnetic",
+        data_ex, data_ex_bg, data_hy, data_hy_bg = csem_layered_earth_batch(
+            [
+                dict(model, rx_direction="x"),
+                dict(model_bg, rx_direction="x"),
+                dict(model_bg, rx_direction="y", rx_type="magnetic"),
+                dict(model_bg, rx_direction="y", rx_type="magnetic"),
+            ]
         )
         data = utils.EMArray(data_ex / data_hy)
         data_bg = utils.EMArray(data_ex_bg / data_hy_bg)
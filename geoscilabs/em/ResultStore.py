@@ -0,0 +1,150 @@
+import glob
+import hashlib
+import os
+
+import numpy as np
+
+# version of the layout of the stored results, increase it when the results
+# of the simulations change so that the keys of old entries no longer match
+schema_version = 1
+
+
+def _versions():
+    """
+        Versions the stored results depend on
+    """
+    versions = ["schema={}".format(schema_version)]
+    for name in ["SimPEG", "discretize"]:
+        try:
+            module = __import__(name)
+            versions.append("{}={}".format(name, getattr(module, "__version__", "")))
+        except ImportError:
+            versions.append("{}=".format(name))
+    return versions
+
+
+def cache_directory():
+    """
+        Directory of the geoscilabs caches, $GEOSCILABS_CACHE_DIR or
+        ~/.cache/geoscilabs
+    """
+    return os.environ.get(
+        "GEOSCILABS_CACHE_DIR",
+        os.path.join(os.path.expanduser("~"), ".cache", "geoscilabs"),
+    )
+
+
+class ResultStore(object):
+    """
+        Content-addressed store of simulation results on disk
+
+        Each entry is a compressed .npz file (or an .h5 file written by a
+        simulation, see contains) named after the hash of the inputs of the
+        simulation. Loading an entry marks it as recently used,
+        and the least recently used entries are removed once the store is
+        larger than max_size bytes. The directory defaults to
+        cache_directory(); the store is disabled if it cannot be created.
+    """
+
+    def __init__(self, directory=None, max_size=500e6):
+        if directory is None:
+            directory = cache_directory()
+        self.directory = directory
+        self.max_size = max_size
+        try:
+            os.makedirs(directory, exist_ok=True)
+            self.enabled = True
+        except OSError:
+            self.enabled = False
+
+    @staticmethod
+    def key(*args):
+        """
+            Hash of strings, numbers and arrays, salted with schema_version
+            and the versions of SimPEG and discretize
+        """
+        h = hashlib.sha1()
+        for version in _versions():
+            h.update(version.encode())
+        for arg in args:
+            if isinstance(arg, str):
+                h.update(arg.encode())
+            else:
+                arg = np.asarray(arg)
+                h.update(str((arg.dtype, arg.shape)).encode())
+                h.update(np.ascontiguousarray(arg).tobytes())
+        return h.hexdigest()
+
+    extensions = (".npz", ".h5")
+
+    def path(self, key, ext=".npz"):
+        return os.path.join(self.directory, key + ext)
+
+    def contains(self, key, ext=".npz"):
+        """
+            Whether an entry is stored under key, marks it as recently used
+        """
+        if not self.enabled:
+            return False
+        try:
+            os.utime(self.path(key, ext))
+        except OSError:
+            return False
+        return True
+
+    def load(self, key):
+        """
+            Arrays stored under key, or None
+        """
+        if not self.enabled:
+            return None
+        path = self.path(key)
+        try:
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in data.files}
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return arrays
+
+    def save(self, key, **arrays):
+        if not self.enabled:
+            return
+        path = self.path(key)
+        try:
+            with open(path + ".tmp", "wb") as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(path + ".tmp", path)
+        except OSError:
+            return
+        self.evict()
+
+    def evict(self, keep=()):
+        """
+            Remove the least recently used entries beyond max_size, except
+            the files in keep
+        """
+        keep = set(os.path.abspath(path) for path in keep)
+        entries = []
+        paths = []
+        for ext in self.extensions:
+            paths += glob.glob(os.path.join(self.directory, "*" + ext))
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, path in entries:
+            if size <= self.max_size:
+                break
+            if os.path.abspath(path) in keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            size -= entry_size
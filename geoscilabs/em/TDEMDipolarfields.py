@@ -8,6 +8,32 @@ from SimPEG import utils
 # r = lambda dx, dy, dz: np.sqrt( dx**2. + dy**2. + dz**2.)
 
 
+def _dipole_geometry(XYZ, srcLoc, t):
+    """
+        Offsets from the source shaped (nloc, 1) and times shaped (1, ntime)
+        so that every kernel broadcasts to a (nloc, ntime) array
+    """
+    XYZ = as_array_n_by_dim(XYZ, 3)
+    t = np.atleast_1d(np.asarray(t, dtype=float)).ravel()
+
+    dx = (XYZ[:, 0] - srcLoc[0])[:, None]
+    dy = (XYZ[:, 1] - srcLoc[1])[:, None]
+    dz = (XYZ[:, 2] - srcLoc[2])[:, None]
+
+    r = np.sqrt(dx ** 2.0 + dy ** 2.0 + dz ** 2.0)
+    return dx, dy, dz, r, t[None, :]
+
+
+def _squeeze_time_axis(*fields):
+    """
+        Return 1D arrays when either a single location or a single time was
+        requested, and (nloc, ntime) arrays otherwise
+    """
+    if 1 in fields[0].shape:
+        return tuple(field.ravel() for field in fields)
+    return fields
+
+
 def E_from_ElectricDipoleWholeSpace(
     XYZ, srcLoc, sig, t, current=1.0, length=1.0, orientation="X", kappa=0.0, epsr=1.0
 ):
@@ -16,6 +42,7 @@ def E_from_ElectricDipoleWholeSpace(
         Computing the analytic electric fields (E) from an electrical dipole in a wholespace
         - You have the option of computing E for multiple times at a single reciever location
           or a single time at multiple locations
+        - Multiple times at multiple locations are broadcast to (nloc, ntime) arrays
 
         :param numpy.array XYZ: reciever locations at which to evaluate E
         :param numpy.array srcLoc: [x,y,z] triplet defining the location of the electric dipole source
@@ -33,47 +60,35 @@ def E_from_ElectricDipoleWholeSpace(
     mu = mu_0 * (1 + kappa)
     # epsilon = epsilon_0 * epsr
 
-    XYZ = as_array_n_by_dim(XYZ, 3)
-    # Check
-    if XYZ.shape[0] > 1 & t.shape[0] > 1:
-        raise Exception(
-            "I/O type error: For multiple field locations only a single time can be specified."
-        )
-
-    dx = XYZ[:, 0] - srcLoc[0]
-    dy = XYZ[:, 1] - srcLoc[1]
-    dz = XYZ[:, 2] - srcLoc[2]
-
-    r = np.sqrt(dx ** 2.0 + dy ** 2.0 + dz ** 2.0)
+    dx, dy, dz, r, t = _dipole_geometry(XYZ, srcLoc, t)
     theta = np.sqrt((mu * sig) / (4 * t))
 
     front = current * length / (4.0 * pi * sig * r ** 3)
-    mid = 3 * erf(theta * r) - (
-        4 / np.sqrt(pi) * (theta) ** 3 * r ** 3 + 6 / np.sqrt(pi) * theta * r
-    ) * np.exp(-((theta) ** 2) * (r) ** 2)
-    extra = erf(theta * r) - (
-        4 / np.sqrt(pi) * (theta) ** 3 * r ** 3 + 2 / np.sqrt(pi) * theta * r
-    ) * np.exp(-((theta) ** 2) * (r) ** 2)
+    tr = theta * r
+    erf_tr = erf(tr)
+    exp_tr = np.exp(-(tr ** 2))
+    mid = 3 * erf_tr - (4 / np.sqrt(pi) * tr ** 3 + 6 / np.sqrt(pi) * tr) * exp_tr
+    extra = erf_tr - (4 / np.sqrt(pi) * tr ** 3 + 2 / np.sqrt(pi) * tr) * exp_tr
 
     if orientation.upper() == "X":
         Ex = front * (dx ** 2 / r ** 2) * mid - front * extra
         Ey = front * (dx * dy / r ** 2) * mid
         Ez = front * (dx * dz / r ** 2) * mid
-        return Ex, Ey, Ez
+        return _squeeze_time_axis(Ex, Ey, Ez)
 
     elif orientation.upper() == "Y":
         #  x--> y, y--> z, z-->x
         Ey = front * (dy ** 2 / r ** 2) * mid - front * extra
         Ez = front * (dy * dz / r ** 2) * mid
         Ex = front * (dy * dx / r ** 2) * mid
-        return Ex, Ey, Ez
+        return _squeeze_time_axis(Ex, Ey, Ez)
 
     elif orientation.upper() == "Z":
         # x --> z, y --> x, z --> y
         Ez = front * (dz ** 2 / r ** 2) * mid - front * extra
         Ex = front * (dz * dx / r ** 2) * mid
         Ey = front * (dz * dy / r ** 2) * mid
-        return Ex, Ey, Ez
+        return _squeeze_time_axis(Ex, Ey, Ez)
 
 
 def J_from_ElectricDipoleWholeSpace(
@@ -84,6 +99,7 @@ def J_from_ElectricDipoleWholeSpace(
         Computing the analytic current density (J) from an electrical dipole in a wholespace
         - You have the option of computing J for multiple times at a single reciever location
           or a single time at multiple locations
+        - Multiple times at multiple locations are broadcast to (nloc, ntime) arrays
 
         :param numpy.array XYZ: reciever locations at which to evaluate J
         :param numpy.array srcLoc: [x,y,z] triplet defining the location of the electric dipole source
@@ -123,6 +139,7 @@ def H_from_ElectricDipoleWholeSpace(
         Computing the analytic magnetic fields (H) from an electrical dipole in a wholespace
         - You have the option of computing H for multiple times at a single reciever location
           or a single time at multiple locations
+        - Multiple times at multiple locations are broadcast to (nloc, ntime) arrays
 
         :param numpy.array XYZ: reciever locations at which to evaluate H
         :param numpy.array srcLoc: [x,y,z] triplet defining the location of the electric dipole source
@@ -139,41 +156,29 @@ def H_from_ElectricDipoleWholeSpace(
 
     mu = mu_0 * (1 + kappa)
     # epsilon = epsilon_0 * epsr
-    XYZ = as_array_n_by_dim(XYZ, 3)
-    # Check
-    if XYZ.shape[0] > 1 & t.shape[0] > 1:
-        raise Exception(
-            "I/O type error: For multiple field locations only a single time can be specified."
-        )
-
-    dx = XYZ[:, 0] - srcLoc[0]
-    dy = XYZ[:, 1] - srcLoc[1]
-    dz = XYZ[:, 2] - srcLoc[2]
-
-    r = np.sqrt(dx ** 2.0 + dy ** 2.0 + dz ** 2.0)
+    dx, dy, dz, r, t = _dipole_geometry(XYZ, srcLoc, t)
     theta = np.sqrt((mu * sig) / (4 * t))
 
     front = (current * length) / (4.0 * pi * (r) ** 3)
-    mid = erf(theta * r) - (2 / np.sqrt(pi)) * theta * r * np.exp(
-        -((theta) ** 2) * (r) ** 2
-    )
+    tr = theta * r
+    mid = erf(tr) - (2 / np.sqrt(pi)) * tr * np.exp(-(tr ** 2))
     if orientation.upper() == "X":
         Hy = front * mid * -dz
         Hz = front * mid * dy
         Hx = np.zeros_like(Hy)
-        return Hx, Hy, Hz
+        return _squeeze_time_axis(Hx, Hy, Hz)
 
     elif orientation.upper() == "Y":
         Hx = front * mid * dz
         Hz = front * mid * -dx
         Hy = np.zeros_like(Hx)
-        return Hx, Hy, Hz
+        return _squeeze_time_axis(Hx, Hy, Hz)
 
     elif orientation.upper() == "Z":
         Hx = front * mid * -dy
         Hy = front * mid * dx
         Hz = np.zeros_like(Hx)
-        return Hx, Hy, Hz
+        return _squeeze_time_axis(Hx, Hy, Hz)
 
 
 def dHdt_from_ElectricDipoleWholeSpace(
@@ -184,6 +189,7 @@ def dHdt_from_ElectricDipoleWholeSpace(
         Computing the analytic timd derivative of magnetic fields (dH/dt) from an electrical dipole in a wholespace
         - You have the option of computing H for multiple times at a single reciever location
           or a single time at multiple locations
+        - Multiple times at multiple locations are broadcast to (nloc, ntime) arrays
 
         :param numpy.array XYZ: reciever locations at which to evaluate H
         :param numpy.array srcLoc: [x,y,z] triplet defining the location of the electric dipole source
@@ -200,18 +206,7 @@ def dHdt_from_ElectricDipoleWholeSpace(
 
     mu = mu_0 * (1 + kappa)
     # epsilon = epsilon_0 * epsr
-    XYZ = as_array_n_by_dim(XYZ, 3)
-    # Check
-    if XYZ.shape[0] > 1 & t.shape[0] > 1:
-        raise Exception(
-            "I/O type error: For multiple field locations only a single time can be specified."
-        )
-
-    dx = XYZ[:, 0] - srcLoc[0]
-    dy = XYZ[:, 1] - srcLoc[1]
-    dz = XYZ[:, 2] - srcLoc[2]
-
-    r = np.sqrt(dx ** 2.0 + dy ** 2.0 + dz ** 2.0)
+    dx, dy, dz, r, t = _dipole_geometry(XYZ, srcLoc, t)
     theta = np.sqrt((mu * sig) / (4 * t))
 
     front = -2.0 * (current * length) * theta ** 5 * np.exp(-((theta) ** 2) * (r) ** 2)
@@ -221,19 +216,19 @@ def dHdt_from_ElectricDipoleWholeSpace(
         Hy = front * mid * -dz
         Hz = front * mid * dy
         Hx = np.zeros_like(Hy)
-        return Hx, Hy, Hz
+        return _squeeze_time_axis(Hx, Hy, Hz)
 
     elif orientation.upper() == "Y":
         Hx = front * mid * dz
         Hz = front * mid * -dx
         Hy = np.zeros_like(Hx)
-        return Hx, Hy, Hz
+        return _squeeze_time_axis(Hx, Hy, Hz)
 
     elif orientation.upper() == "Z":
         Hx = front * mid * -dy
         Hy = front * mid * dx
         Hz = np.zeros_like(Hx)
-        return Hx, Hy, Hz
+        return _squeeze_time_axis(Hx, Hy, Hz)
 
 
 def B_from_ElectricDipoleWholeSpace(
@@ -244,6 +239,7 @@ def B_from_ElectricDipoleWholeSpace(
         Computing the analytic magnetic flux density (B) from an electrical dipole in a wholespace
         - You have the option of computing B for multiple times at a single reciever location
           or a single time at multiple locations
+        - Multiple times at multiple locations are broadcast to (nloc, ntime) arrays
 
         :param numpy.array XYZ: reciever locations at which to evaluate B
         :param numpy.array srcLoc: [x,y,z] triplet defining the location of the electric dipole source
@@ -285,6 +281,7 @@ def E_from_MagneticDipoleWholeSpace(
         Computing the analytic electric fields (E) from an magnetic dipole in a wholespace
         - You have the option of computing E for multiple times at a single reciever location
           or a single time at multiple locations
+        - Multiple times at multiple locations are broadcast to (nloc, ntime) arrays
 
         :param numpy.array XYZ: reciever locations at which to evaluate E
         :param numpy.array srcLoc: [x,y,z] triplet defining the location of the electric dipole source
@@ -301,18 +298,7 @@ def E_from_MagneticDipoleWholeSpace(
 
     mu = mu_0 * (1 + kappa)
     # epsilon = epsilon_0 * epsr
-    XYZ = as_array_n_by_dim(XYZ, 3)
-    # Check
-    if XYZ.shape[0] > 1 & t.shape[0] > 1:
-        raise Exception(
-            "I/O type error: For multiple field locations only a single time can be specified."
-        )
-
-    dx = XYZ[:, 0] - srcLoc[0]
-    dy = XYZ[:, 1] - srcLoc[1]
-    dz = XYZ[:, 2] - srcLoc[2]
-
-    r = np.sqrt(dx ** 2.0 + dy ** 2.0 + dz ** 2.0)
+    dx, dy, dz, r, t = _dipole_geometry(XYZ, srcLoc, t)
     theta = np.sqrt((mu * sig) / (4 * t))
 
     front = 2.0 * (current * length) * theta ** 5 * np.exp(-((theta) ** 2) * (r) ** 2)
@@ -322,19 +308,19 @@ def E_from_MagneticDipoleWholeSpace(
         Ey = front * mid * -dz
         Ez = front * mid * dy
         Ex = np.zeros_like(Ey)
-        return Ex, Ey, Ez
+        return _squeeze_time_axis(Ex, Ey, Ez)
 
     elif orientation.upper() == "Y":
         Ex = front * mid * dz
         Ez = front * mid * -dx
         Ey = np.zeros_like(Ex)
-        return Ex, Ey, Ez
+        return _squeeze_time_axis(Ex, Ey, Ez)
 
     elif orientation.upper() == "Z":
         Ex = front * mid * -dy
         Ey = front * mid * dx
         Ez = np.zeros_like(Ex)
-        return Ex, Ey, Ez
+        return _squeeze_time_axis(Ex, Ey, Ez)
 
 
 def J_from_MagneticDipoleWholeSpace(
@@ -345,6 +331,7 @@ def J_from_MagneticDipoleWholeSpace(
         Computing the analytic current density (J) from an magnetic dipole in a wholespace
         - You have the option of computing J for multiple times at a single reciever location
           or a single time at multiple locations
+        - Multiple times at multiple locations are broadcast to (nloc, ntime) arrays
 
         :param numpy.array XYZ: reciever locations at which to evaluate J
         :param numpy.array srcLoc: [x,y,z] triplet defining the location of the electric dipole source
@@ -384,6 +371,7 @@ def H_from_MagneticDipoleWholeSpace(
         Computing the analytic magnetic fields (H) from an magnetic dipole in a wholespace
         - You have the option of computing E for multiple times at a single reciever location
           or a single time at multiple locations
+        - Multiple times at multiple locations are broadcast to (nloc, ntime) arrays
 
         :param numpy.array XYZ: reciever locations at which to evaluate E
         :param numpy.array srcLoc: [x,y,z] triplet defining the location of the electric dipole source
@@ -401,47 +389,35 @@ def H_from_MagneticDipoleWholeSpace(
     mu = mu_0 * (1 + kappa)
     # epsilon = epsilon_0 * epsr
 
-    XYZ = as_array_n_by_dim(XYZ, 3)
-    # Check
-    if XYZ.shape[0] > 1 & t.shape[0] > 1:
-        raise Exception(
-            "I/O type error: For multiple field locations only a single time can be specified."
-        )
-
-    dx = XYZ[:, 0] - srcLoc[0]
-    dy = XYZ[:, 1] - srcLoc[1]
-    dz = XYZ[:, 2] - srcLoc[2]
-
-    r = np.sqrt(dx ** 2.0 + dy ** 2.0 + dz ** 2.0)
+    dx, dy, dz, r, t = _dipole_geometry(XYZ, srcLoc, t)
     theta = np.sqrt((mu * sig) / (4 * t))
 
     front = current * length / (4.0 * pi * r ** 3)
-    mid = 3 * erf(theta * r) - (
-        4 / np.sqrt(pi) * (theta) ** 3 * r ** 3 + 6 / np.sqrt(pi) * theta * r
-    ) * np.exp(-((theta) ** 2) * (r) ** 2)
-    extra = erf(theta * r) - (
-        4 / np.sqrt(pi) * (theta) ** 3 * r ** 3 + 2 / np.sqrt(pi) * theta * r
-    ) * np.exp(-((theta) ** 2) * (r) ** 2)
+    tr = theta * r
+    erf_tr = erf(tr)
+    exp_tr = np.exp(-(tr ** 2))
+    mid = 3 * erf_tr - (4 / np.sqrt(pi) * tr ** 3 + 6 / np.sqrt(pi) * tr) * exp_tr
+    extra = erf_tr - (4 / np.sqrt(pi) * tr ** 3 + 2 / np.sqrt(pi) * tr) * exp_tr
 
     if orientation.upper() == "X":
         Hx = front * (dx ** 2 / r ** 2) * mid - front * extra
         Hy = front * (dx * dy / r ** 2) * mid
         Hz = front * (dx * dz / r ** 2) * mid
-        return Hx, Hy, Hz
+        return _squeeze_time_axis(Hx, Hy, Hz)
 
     elif orientation.upper() == "Y":
         #  x--> y, y--> z, z-->x
         Hy = front * (dy ** 2 / r ** 2) * mid - front * extra
         Hz = front * (dy * dz / r ** 2) * mid
         Hx = front * (dy * dx / r ** 2) * mid
-        return Hx, Hy, Hz
+        return _squeeze_time_axis(Hx, Hy, Hz)
 
     elif orientation.upper() == "Z":
         # x --> z, y --> x, z --> y
         Hz = front * (dz ** 2 / r ** 2) * mid - front * extra
         Hx = front * (dz * dx / r ** 2) * mid
         Hy = front * (dz * dy / r ** 2) * mid
-        return Hx, Hy, Hz
+        return _squeeze_time_axis(Hx, Hy, Hz)
 
 
 def dHdt_from_MagneticDipoleWholeSpace(
@@ -452,6 +428,7 @@ def dHdt_from_MagneticDipoleWholeSpace(
         Computing the analytic timd derivative of magnetic fields (dH/dt) from an magnetic dipole in a wholespace
         - You have the option of computing H for multiple times at a single reciever location
           or a single time at multiple locations
+        - Multiple times at multiple locations are broadcast to (nloc, ntime) arrays
 
         :param numpy.array XYZ: reciever locations at which to evaluate H
         :param numpy.array srcLoc: [x,y,z] triplet defining the location of the electric dipole source
@@ -469,18 +446,7 @@ def dHdt_from_MagneticDipoleWholeSpace(
     mu = mu_0 * (1 + kappa)
     # epsilon = epsilon_0 * epsr
 
-    XYZ = as_array_n_by_dim(XYZ, 3)
-    # Check
-    if XYZ.shape[0] > 1 & t.shape[0] > 1:
-        raise Exception(
-            "I/O type error: For multiple field locations only a single time can be specified."
-        )
-
-    dx = XYZ[:, 0] - srcLoc[0]
-    dy = XYZ[:, 1] - srcLoc[1]
-    dz = XYZ[:, 2] - srcLoc[2]
-
-    r = np.sqrt(dx ** 2.0 + dy ** 2.0 + dz ** 2.0)
+    dx, dy, dz, r, t = _dipole_geometry(XYZ, srcLoc, t)
     theta = np.sqrt((mu * sig) / (4 * t))
 
     front = -4 * (current * length) * theta ** 5 * np.exp(-((theta) ** 2) * (r) ** 2)
@@ -492,21 +458,21 @@ def dHdt_from_MagneticDipoleWholeSpace(
         Hx = front * (dx ** 2 / r ** 2) * mid + front * extra
         Hy = front * (dx * dy / r ** 2) * mid
         Hz = front * (dx * dz / r ** 2) * mid
-        return Hx, Hy, Hz
+        return _squeeze_time_axis(Hx, Hy, Hz)
 
     elif orientation.upper() == "Y":
         #  x--> y, y--> z, z-->x
         Hy = front * (dy ** 2 / r ** 2) * mid + front * extra
         Hz = front * (dy * dz / r ** 2) * mid
         Hx = front * (dy * dx / r ** 2) * mid
-        return Hx, Hy, Hz
+        return _squeeze_time_axis(Hx, Hy, Hz)
 
     elif orientation.upper() == "Z":
         # x --> z, y --> x, z --> y
         Hz = front * (dz ** 2 / r ** 2) * mid + front * extra
         Hx = front * (dz * dx / r ** 2) * mid
         Hy = front * (dz * dy / r ** 2) * mid
-        return Hx, Hy, Hz
+        return _squeeze_time_axis(Hx, Hy, Hz)
 
 
 def B_from_MagneticDipoleWholeSpace(
@@ -517,6 +483,7 @@ def B_from_MagneticDipoleWholeSpace(
         Computing the analytic magnetic flux density (B) from an electrical dipole in a wholespace
         - You have the option of computing B for multiple times at a single reciever location
           or a single time at multiple locations
+        - Multiple times at multiple locations are broadcast to (nloc, ntime) arrays
 
         :param numpy.array XYZ: reciever locations at which to evaluate B
         :param numpy.array srcLoc: [x,y,z] triplet defining the location of the electric dipole source
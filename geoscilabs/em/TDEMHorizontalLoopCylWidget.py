@@ -10,10 +10,14 @@ from PIL import Image
 from scipy.constants import mu_0
 import requests
 from io import StringIO
+import hashlib
+import time
+from collections import OrderedDict
 
 from ..base import widgetify
 from .DipoleWidgetFD import DisPosNegvalues
 from .BiotSavart import BiotSavartFun
+from .ResultStore import ResultStore
 
 
 class TDEMHorizontalLoopCylWidget(object):
@@ -28,8 +32,15 @@ class TDEMHorizontalLoopCylWidget(object):
     mesh2D = None
     mu = None
     counter = 0
+    # number of time-step factorizations kept across simulate calls, keyed on
+    # (model hash, dt)
+    factorization_cache_size = 16
 
     def __init__(self):
+        self._factorizations = OrderedDict()
+        self.nSolves = 0
+        self.nFactorizations = 0
+        self.store = ResultStore()
         self.genMesh()
         self.getCoreDomain()
         # url = "http://em.geosci.xyz/_images/disc_dipole.png"
@@ -38,12 +49,10 @@ class TDEMHorizontalLoopCylWidget(object):
         self.time = np.logspace(-5, -2, 41)
 
     def mirrorArray(self, x, direction="x"):
-        X = x.reshape((self.nx_core, self.ny_core), order="F")
+        X2 = utils.mkvc(x)[self.mirrorInd]
         if direction == "x" or direction == "y":
-            X2 = np.vstack((-np.flipud(X), X))
-        else:
-            X2 = np.vstack((np.flipud(X), X))
-        return X2
+            X2 = X2 * self.mirrorSign
+        return X2.reshape((2 * self.nx_core, self.ny_core), order="F")
 
     def genMesh(self, h=0.0, cs=3.0, ncx=15, ncz=30, npad=20):
         """
@@ -73,6 +82,49 @@ class TDEMHorizontalLoopCylWidget(object):
         hx = np.r_[self.mesh.h[0][xind][::-1], self.mesh.h[0][xind]]
         hz = self.mesh.h[2][yind]
         self.mesh2D = TensorMesh([hx, hz], x0="CC")
+        self.getCoreOperators()
+
+    def getCoreOperators(self):
+        """
+            Index maps and interpolation matrices from the mesh to the
+            mirrored core domain (mesh2D), built once with the mesh
+        """
+        core = np.arange(self.nx_core * self.ny_core).reshape(
+            (self.nx_core, self.ny_core), order="F"
+        )
+        self.mirrorInd = utils.mkvc(np.vstack((np.flipud(core), core)))
+        self.mirrorSign = utils.mkvc(
+            np.vstack((-np.ones_like(core), np.ones_like(core)))
+        )
+        self.mirrorCC = np.where(self.activeCC)[0][self.mirrorInd]
+
+        gridCC = self.mesh.cell_centers[self.mirrorCC, :]
+        Sxy = utils.sdiag(self.mirrorSign)
+        self.Pfx = Sxy * self.mesh.get_interpolation_matrix(gridCC, location_type="Fx")
+        self.Pfz = self.mesh.get_interpolation_matrix(gridCC, location_type="Fz")
+        self.Pey = Sxy * self.mesh.aveE2CC[self.mirrorCC, :]
+        # dB/dt = -curl e on the faces
+        self.Pcx = -self.Pfx * self.mesh.edge_curl
+        self.Pcz = -self.Pfz * self.mesh.edge_curl
+
+    def getRxOperators(self):
+        """
+            Interpolation matrices to the receiver locations, rebuilt only when
+            rxLoc changes
+        """
+        key = np.asarray(self.rxLoc, dtype=float).tobytes()
+        if getattr(self, "_rxKey", None) != key:
+            self._rxKey = key
+            P = {
+                locType: self.mesh.get_interpolation_matrix(
+                    self.rxLoc, location_type=locType
+                )
+                for locType in ["Fx", "Fz", "Ey"]
+            }
+            P["Cx"] = -P["Fx"] * self.mesh.edge_curl
+            P["Cz"] = -P["Fz"] * self.mesh.edge_curl
+            self._rxOperators = P
+        return self._rxOperators
 
     def getCoreModel(self, Type):
 
@@ -134,13 +186,13 @@ class TDEMHorizontalLoopCylWidget(object):
         self.sig2 = sig2  # 2nd layer \sigma
         self.sig3 = sig3  # 3rd layer \sigma
 
-        active = self.mesh.vectorCCz < self.z0
-        ind1 = (self.mesh.vectorCCz < self.z0) & (self.mesh.vectorCCz >= self.z1)
-        ind2 = (self.mesh.vectorCCz < self.z1) & (self.mesh.vectorCCz >= self.z2)
+        active = self.mesh.cell_centers_z < self.z0
+        ind1 = (self.mesh.cell_centers_z < self.z0) & (self.mesh.cell_centers_z >= self.z1)
+        ind2 = (self.mesh.cell_centers_z < self.z1) & (self.mesh.cell_centers_z >= self.z2)
         self.mapping = maps.SurjectVertical1D(self.mesh) * maps.InjectActiveCells(
-            self.mesh, active, sig0, nC=self.mesh.nCz
+            self.mesh, active, sig0, nC=self.mesh.shape_cells[2]
         )
-        model = np.ones(self.mesh.nCz) * sig3
+        model = np.ones(self.mesh.shape_cells[2]) * sig3
         model[ind1] = sig1
         model[ind2] = sig2
         self.m = model[active]
@@ -204,63 +256,82 @@ class TDEMHorizontalLoopCylWidget(object):
             (1e-3, 10),
         ]
 
-        self.f = sim.fields(self.m)
+        # the fields do not depend on the receivers, so they are not part of
+        # the key of the stored solution
+        sim.model = self.m
+        key = ResultStore.key(
+            type(sim).__name__,
+            *self.mesh.h,
+            self.mesh.origin,
+            sim.sigma,
+            np.asarray(srcLoc, dtype=float),
+            np.asarray(radius, dtype=float),
+            sim.time_steps,
+        )
+        solution = sim._fieldType + "Solution"
+        stored = self.store.load(key)
+        if stored is None:
+            self.f = self.fields(sim)
+            self.store.save(key, u=self.f[:, solution, :])
+        else:
+            self.f = sim.fieldsPair(sim)
+            self.f[:, solution, :] = stored["u"]
         self.sim = sim
         dpred = sim.dpred(self.m, f=self.f)
         return dpred
 
-    @property
-    def Pfx(self):
-        if getattr(self, "_Pfx", None) is None:
-            self._Pfx = self.mesh.getInterpolationMat(
-                self.mesh.gridCC[self.activeCC, :], locType="Fx"
-            )
-        return self._Pfx
-
-    @property
-    def Pfz(self):
-        if getattr(self, "_Pfz", None) is None:
-            self._Pfz = self.mesh.getInterpolationMat(
-                self.mesh.gridCC[self.activeCC, :], locType="Fz"
-            )
-        return self._Pfz
+    def fields(self, sim):
+        """
+            Same as sim.fields(self.m), reusing the factorizations of earlier
+            simulations of the same model and time step
+        """
+        sim.model = self.m
+        model = hashlib.sha1(sim.sigma.tobytes()).hexdigest()
+        solution = sim._fieldType + "Solution"
+
+        f = sim.fieldsPair(sim)
+        f[:, solution, 0] = sim.getInitialFields()
+        for tInd, dt in enumerate(sim.time_steps):
+            key = (model, float(dt))
+            if key in self._factorizations:
+                self._factorizations.move_to_end(key)
+                Ainv = self._factorizations[key]
+            else:
+                Ainv = sim.solver(sim.getAdiag(tInd), **sim.solver_opts)
+                self.nFactorizations += 1
+                self._factorizations[key] = Ainv
+                while len(self._factorizations) > self.factorization_cache_size:
+                    self._factorizations.popitem(last=False)[1].clean()
+
+            rhs = sim.getRHS(tInd + 1)
+            sol = Ainv * (rhs - sim.getAsubdiag(tInd) * f[:, solution, tInd])
+            self.nSolves += 1
+            if sol.ndim == 1:
+                sol.shape = (sol.size, 1)
+            f[:, solution, tInd + 1] = sol
+        return f
 
     def getFields(self, itime):
         src = self.srcList[0]
+        e = self.f[src, "e", itime]
 
-        Ey = self.mesh.aveE2CC * self.f[src, "e", itime]
-        Jy = utils.sdiag(self.sim.sigma) * Ey
-
-        self.Ey = utils.mkvc(self.mirrorArray(Ey[self.activeCC], direction="y"))
-        self.Jy = utils.mkvc(self.mirrorArray(Jy[self.activeCC], direction="y"))
-        self.Bx = utils.mkvc(
-            self.mirrorArray(self.Pfx * self.f[src, "b", itime], direction="x")
-        )
-        self.Bz = utils.mkvc(
-            self.mirrorArray(self.Pfz * self.f[src, "b", itime], direction="z")
-        )
-        self.dBxdt = utils.mkvc(
-            self.mirrorArray(
-                -self.Pfx * self.mesh.edgeCurl * self.f[src, "e", itime], direction="x"
-            )
-        )
-        self.dBzdt = utils.mkvc(
-            self.mirrorArray(
-                -self.Pfz * self.mesh.edgeCurl * self.f[src, "e", itime], direction="z"
-            )
-        )
+        self.Ey = utils.mkvc(self.Pey * e)
+        self.Jy = self.sim.sigma[self.mirrorCC] * self.Ey
+        self.Bx = utils.mkvc(self.Pfx * self.f[src, "b", itime])
+        self.Bz = utils.mkvc(self.Pfz * self.f[src, "b", itime])
+        self.dBxdt = utils.mkvc(self.Pcx * e)
+        self.dBzdt = utils.mkvc(self.Pcz * e)
 
     def getData(self):
         src = self.srcList[0]
-        Pfx = self.mesh.getInterpolationMat(self.rxLoc, locType="Fx")
-        Pfz = self.mesh.getInterpolationMat(self.rxLoc, locType="Fz")
-        Pey = self.mesh.getInterpolationMat(self.rxLoc, locType="Ey")
+        P = self.getRxOperators()
+        e = self.f[src, "e", :]
 
-        self.Ey = (Pey * self.f[src, "e", :]).flatten()
-        self.Bx = (Pfx * self.f[src, "b", :]).flatten()
-        self.Bz = (Pfz * self.f[src, "b", :]).flatten()
-        self.dBxdt = (-Pfx * self.mesh.edgeCurl * self.f[src, "e", :]).flatten()
-        self.dBzdt = (-Pfz * self.mesh.edgeCurl * self.f[src, "e", :]).flatten()
+        self.Ey = (P["Ey"] * e).flatten()
+        self.Bx = (P["Fx"] * self.f[src, "b", :]).flatten()
+        self.Bz = (P["Fz"] * self.f[src, "b", :]).flatten()
+        self.dBxdt = (P["Cx"] * e).flatten()
+        self.dBzdt = (P["Cz"] * e).flatten()
 
     def plotField(
         self,
@@ -926,3 +997,26 @@ class TDEMHorizontalLoopCylWidget(object):
         )
 
         return out
+
+
+def benchmark_simulate(nrepeat=3):
+    """
+        Simulate the default layer and sphere scenarios nrepeat times, without
+        the result store, and return the number of time-step solves and
+        factorizations and the wall time in seconds as a dict
+    """
+    app = TDEMHorizontalLoopCylWidget()
+    app.store.enabled = False
+    srcLoc = np.array([0.0, 0.0, 0.5])
+    rxLoc = np.array([[10.0, 0.0, 0.5]])
+
+    start = time.time()
+    for _ in range(nrepeat):
+        for setParam in [app.setThreeLayerParam, app.setLayerSphereParam]:
+            setParam()
+            app.simulate(srcLoc, rxLoc, app.time)
+    return {
+        "nsolves": app.nSolves,
+        "nfactorizations": app.nFactorizations,
+        "time": time.time() - start,
+    }
@@ -3,8 +3,8 @@ import matplotlib.pyplot as plt
 import deepdish as dd
 from discretize import TensorMesh
 from SimPEG import utils
-import tarfile
 import os
+from collections import OrderedDict
 
 from mpl_toolkits.mplot3d import axes3d
 from matplotlib import cm
@@ -12,47 +12,47 @@ from mpl_toolkits.mplot3d.art3d import Poly3DCollection
 from matplotlib.patches import FancyArrowPatch
 from mpl_toolkits.mplot3d import proj3d
 
+from .TDEMResults import fetch_data, get_mesh_context, run_sweep, TimeSteps
 
-def download_and_unzip_data(
-    url="https://storage.googleapis.com/simpeg/em_examples/tdem_inductivesource/tdem_inductivesource.tar",
-):
-    """
-    Download the data from the storage bucket, unzip the tar file, return
-    the directory where the data are
-    """
-    # download the data
-    downloads = utils.download(url)
 
-    # directory where the downloaded files are
-    directory = downloads.split(".")[0]
+data_url = "https://storage.googleapis.com/simpeg/em_examples/tdem_inductivesource/tdem_inductivesource.tar"
+# sha256 of the tar file at data_url (hex, e.g. from sha256sum of a trusted
+# copy); the downloads of data_url are verified against it once set and a
+# mismatch raises an IOError. Not pinned yet, the data are not verified.
+data_checksum = None
 
-    # unzip the tarfile
-    tar = tarfile.open(downloads, "r")
-    tar.extractall()
-    tar.close()
 
-    return downloads, directory
+def download_and_unzip_data(url=data_url, checksum=None, offline=False):
+    """
+    Download the data from the storage bucket into the data cache, unzip the
+    tar file once, return the directory where the data are. The tar file at
+    data_url is verified against data_checksum unless checksum is given.
+    """
+    if checksum is None and url == data_url:
+        checksum = data_checksum
+    return fetch_data(url, checksum=checksum, offline=offline)
 
 
 use_computed_results = True
 
 
-def load_or_run_results(re_run=False, fname=None, src_type="VMD", sigma_halfspace=0.01):
+def load_or_run_results(
+    re_run=False, fname=None, src_type="VMD", sigma_halfspace=0.01, offline=False
+):
     if re_run:
         run_simulation(fname=fname, sigma_halfspace=sigma_halfspace, src_type=src_type)
     else:
-        downloads, directory = download_and_unzip_data()
+        downloads, directory = download_and_unzip_data(offline=offline)
         fname = os.path.sep.join([directory, fname])
 
-    simulation_results = dd.io.load(fname)
-    mesh = TensorMesh(
-        simulation_results["mesh"]["h"], x0=simulation_results["mesh"]["x0"]
-    )
-    sigma = simulation_results["sigma"]
-    times = simulation_results["time"]
-    E = simulation_results["E"]
-    B = simulation_results["B"]
-    J = simulation_results["J"]
+    # the fields are read one time step at a time when plotted
+    mesh_info = dd.io.load(fname, "/mesh")
+    mesh = TensorMesh(mesh_info["h"], x0=mesh_info["x0"])
+    sigma = dd.io.load(fname, "/sigma")
+    times = dd.io.load(fname, "/time")
+    E = TimeSteps(fname, "E")
+    B = TimeSteps(fname, "B")
+    J = TimeSteps(fname, "J")
     output = {"mesh": mesh, "sigma": sigma, "times": times, "E": E, "B": B, "J": J}
     return output
 
@@ -66,13 +66,11 @@ def choose_source(src_type):
     return known_names[ind]
 
 
-def run_simulation(fname="tdem_vmd.h5", sigma_halfspace=0.01, src_type="VMD"):
-    from SimPEG.electromagnetics import time_domain
-    from scipy.constants import mu_0
-    import numpy as np
-    from SimPEG import maps
-    from pymatsolver import Pardiso
-
+def mesh_context():
+    """
+    Mesh of run_simulation with its core mesh and interpolation operators,
+    built once and shared by the runs
+    """
     cs = 20.0
     ncx, ncy, ncz = 5, 3, 4
     npad = 10
@@ -82,13 +80,22 @@ def run_simulation(fname="tdem_vmd.h5", sigma_halfspace=0.01, src_type="VMD"):
     hy = [(cs, npad, -pad_rate), (cs, ncy), (cs, npad, pad_rate)]
     hz = utils.meshTensor([(cs, npadz, -1.3), (cs / 2.0, ncz), (cs, 5, 2)])
     mesh = TensorMesh([hx, hy, hz], x0=["C", "C", -hz[: int(npadz + ncz / 2)].sum()])
+    xyzlim = np.array([[-600.0, 600.0], [-600.0, 600.0], [-600, 100.0]])
+    return get_mesh_context(mesh, xyzlim)
+
+
+def run_simulation(fname="tdem_vmd.h5", sigma_halfspace=0.01, src_type="VMD"):
+    from SimPEG.electromagnetics import time_domain
+    from scipy.constants import mu_0
+    import numpy as np
+    from SimPEG import maps
+    from pymatsolver import Pardiso
+
+    context = mesh_context()
+    mesh = context.mesh
     sigma = np.ones(mesh.nC) * sigma_halfspace
     sigma[mesh.gridCC[:, 2] > 0.0] = 1e-8
 
-    xmin, xmax = -600.0, 600.0
-    ymin, ymax = -600.0, 600.0
-    zmin, zmax = -600, 100.0
-
     times = np.logspace(-5, -2, 21)
     rxList = time_domain.receivers.PointMagneticFluxTimeDerivative(
         np.r_[10.0, 0.0, 30.0], times, orientation="z"
@@ -110,9 +117,6 @@ def run_simulation(fname="tdem_vmd.h5", sigma_halfspace=0.01, src_type="VMD"):
         )
     SrcList = [src]
     survey = time_domain.Survey(SrcList)
-    sig = 1e-2
-    sigma = np.ones(mesh.nC) * sig
-    sigma[mesh.gridCC[:, 2] > 0] = 1e-8
     prb = time_domain.Simulation3DMagneticFluxDensity(
         mesh,
         sigmaMap=maps.IdentityMap(mesh),
@@ -131,35 +135,28 @@ def run_simulation(fname="tdem_vmd.h5", sigma_halfspace=0.01, src_type="VMD"):
 
     f = prb.fields(sigma)
 
-    xyzlim = np.array([[xmin, xmax], [ymin, ymax], [zmin, zmax]])
-    actinds, meshCore = utils.extract_core_mesh(xyzlim, mesh)
-    Pex = mesh.getInterpolationMat(meshCore.gridCC, locType="Ex")
-    Pey = mesh.getInterpolationMat(meshCore.gridCC, locType="Ey")
-    Pez = mesh.getInterpolationMat(meshCore.gridCC, locType="Ez")
-    Pfx = mesh.getInterpolationMat(meshCore.gridCC, locType="Fx")
-    Pfy = mesh.getInterpolationMat(meshCore.gridCC, locType="Fy")
-    Pfz = mesh.getInterpolationMat(meshCore.gridCC, locType="Fz")
-
-    sigma_core = sigma[actinds]
-
-    def getEBJcore(src0):
-        B0 = np.r_[Pfx * f[src0, "b"], Pfy * f[src0, "b"], Pfz * f[src0, "b"]]
-        E0 = np.r_[Pex * f[src0, "e"], Pey * f[src0, "e"], Pez * f[src0, "e"]]
-        J0 = utils.sdiag(np.r_[sigma_core, sigma_core, sigma_core]) * E0
-        return E0, B0, J0
-
-    E, B, J = getEBJcore(src)
+    E, B, J = context.getEBJcore(f, src, sigma)
     tdem_is = {
         "E": E,
         "B": B,
         "J": J,
-        "sigma": sigma_core,
-        "mesh": meshCore.serialize(),
+        "sigma": sigma[context.actinds],
+        "mesh": context.meshCore.serialize(),
         "time": prb.times,
     }
     dd.io.save(fname, tdem_is)
 
 
+def run_simulations(configs, n_jobs=1, store=None):
+    """
+    Run a sweep of (sigma_block, sigma_halfspace, src_type) configurations
+    and return the .h5 file of each, see TDEMResults.run_sweep. sigma_block
+    is not used by this model and does not enter the key.
+    """
+    parameters = ("sigma_halfspace", "src_type")
+    return run_sweep(run_simulation, configs, parameters, n_jobs=n_jobs, store=store)
+
+
 # ------------------------------------------------------------------- #
 # For visualizations
 # ------------------------------------------------------------------- #
@@ -176,9 +173,14 @@ class PlotTDEM(object):
     B = None
     J = None
 
+    # number of 2D slices kept, keyed on (field, itime, normal, loc) and the
+    # selected component
+    slice_cache_size = 32
+
     def __init__(self, **kwargs):
         super(PlotTDEM, self).__init__()
         utils.setKwargs(self, **kwargs)
+        self._slices = OrderedDict()
         self.xmin, self.xmax = self.mesh.cell_centers_x.min(), self.mesh.cell_centers_x.max()
         self.ymin, self.ymax = self.mesh.cell_centers_y.min(), self.mesh.cell_centers_y.max()
         self.zmin, self.zmax = self.mesh.cell_centers_z.min(), self.mesh.cell_centers_z.max()
@@ -237,13 +239,41 @@ class PlotTDEM(object):
         plt.xscale(scale)
         plt.show()
 
+    def timeStep(self, name, itime):
+        vec = getattr(self, name)
+        if isinstance(vec, TimeSteps):
+            return vec.step(itime)
+        return vec[:, itime]
+
+    def getSlice(self, name, itime, normal="Z", loc=0.0, isz=False, isy=False):
+        """
+        2D slice of the field name (E, B or J) at time step itime
+        """
+        key = (name, itime, normal, loc, isz, isy)
+        if key not in self._slices:
+            self._slices[key] = self.sliceTimeStep(
+                self.mesh,
+                self.timeStep(name, itime),
+                normal=normal,
+                loc=loc,
+                isz=isz,
+                isy=isy,
+            )
+            while len(self._slices) > self.slice_cache_size:
+                self._slices.popitem(last=False)
+        self._slices.move_to_end(key)
+        return self._slices[key]
+
     def getSlices(self, mesh, vec, itime, normal="Z", loc=0.0, isz=False, isy=False):
-        VEC = vec[:, itime].reshape((mesh.nC, 3), order="F")
+        return self.sliceTimeStep(
+            mesh, vec[:, itime], normal=normal, loc=loc, isz=isz, isy=isy
+        )
+
+    def sliceTimeStep(self, mesh, vec, normal="Z", loc=0.0, isz=False, isy=False):
+        V = np.asarray(vec).reshape(tuple(mesh.shape_cells) + (3,), order="F")
         if normal == "Z":
             ind = np.argmin(abs(mesh.cell_centers_z - loc))
-            vx = VEC[:, 0].reshape((mesh.shape_cells[0], mesh.mesh.shape_cells[1], mesh.mesh.shape_cells[2]), order="F")[:, :, ind]
-            vy = VEC[:, 1].reshape((mesh.shape_cells[0], mesh.mesh.shape_cells[1], mesh.mesh.shape_cells[2]), order="F")[:, :, ind]
-            vz = VEC[:, 2].reshape((mesh.shape_cells[0], mesh.mesh.shape_cells[1], mesh.mesh.shape_cells[2]), order="F")[:, :, ind]
+            vx, vy, vz = V[:, :, ind, 0], V[:, :, ind, 1], V[:, :, ind, 2]
             xy = utils.ndgrid(mesh.cell_centers_x, mesh.cell_centers_y)
             if isz:
                 return utils.mkvc(vz), xy
@@ -252,9 +282,7 @@ class PlotTDEM(object):
 
         elif normal == "Y":
             ind = np.argmin(abs(mesh.cell_centers_x - loc))
-            vx = VEC[:, 0].reshape((mesh.shape_cells[0], mesh.mesh.shape_cells[1], mesh.mesh.shape_cells[2]), order="F")[:, ind, :]
-            vy = VEC[:, 1].reshape((mesh.shape_cells[0], mesh.mesh.shape_cells[1], mesh.mesh.shape_cells[2]), order="F")[:, ind, :]
-            vz = VEC[:, 2].reshape((mesh.shape_cells[0], mesh.mesh.shape_cells[1], mesh.mesh.shape_cells[2]), order="F")[:, ind, :]
+            vx, vy, vz = V[:, ind, :, 0], V[:, ind, :, 1], V[:, ind, :, 2]
             xz = utils.ndgrid(mesh.cell_centers_x, mesh.cell_centers_z)
             if isz:
                 return utils.mkvc(vz), xz
@@ -265,9 +293,7 @@ class PlotTDEM(object):
 
         elif normal == "X":
             ind = np.argmin(abs(mesh.cell_centers_y - loc))
-            vx = VEC[:, 0].reshape((mesh.shape_cells[0], mesh.mesh.shape_cells[1], mesh.mesh.shape_cells[2]), order="F")[ind, :, :]
-            vy = VEC[:, 1].reshape((mesh.shape_cells[0], mesh.mesh.shape_cells[1], mesh.mesh.shape_cells[2]), order="F")[ind, :, :]
-            vz = VEC[:, 2].reshape((mesh.shape_cells[0], mesh.mesh.shape_cells[1], mesh.mesh.shape_cells[2]), order="F")[ind, :, :]
+            vx, vy, vz = V[ind, :, :, 0], V[ind, :, :, 1], V[ind, :, :, 2]
             yz = utils.ndgrid(mesh.cell_centers_y, mesh.cell_centers_z)
             if isz:
                 return utils.mkvc(vy), yz
@@ -277,10 +303,8 @@ class PlotTDEM(object):
                 return np.c_[utils.mkvc(vy), utils.mkvc(vz)], yz
 
     def plot_electric_currents(self, itime):
-        exy, xy = self.getSlices(self.mesh, self.J, itime, normal="Z", loc=-100.5)
-        exz, xz = self.getSlices(
-            self.mesh, self.J, itime, normal="Y", loc=0.0, isy=True
-        )
+        exy, xy = self.getSlice("J", itime, normal="Z", loc=-100.5)
+        exz, xz = self.getSlice("J", itime, normal="Y", loc=0.0, isy=True)
         label = "Current density (A/m$^2$)"
         plt.figure(figsize=(12, 5))
         ax1 = plt.subplot(121)
@@ -331,10 +355,8 @@ class PlotTDEM(object):
         plt.show()
 
     def plot_magnetic_flux(self, itime):
-        bxy, xy = self.getSlices(
-            self.mesh, self.B, itime, normal="Z", loc=-100.5, isz=True
-        )
-        bxz, xz = self.getSlices(self.mesh, self.B, itime, normal="Y", loc=0.0)
+        bxy, xy = self.getSlice("B", itime, normal="Z", loc=-100.5, isz=True)
+        bxz, xz = self.getSlice("B", itime, normal="Y", loc=0.0)
         label = "Magnetic flux density (T)"
         plt.figure(figsize=(12, 5))
         ax1 = plt.subplot(121)
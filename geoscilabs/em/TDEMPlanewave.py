@@ -2,6 +2,8 @@ import numpy as np
 from scipy.constants import mu_0, pi, epsilon_0
 from SimPEG import utils
 
+from .TDEMDipolarfields import _squeeze_time_axis
+
 
 def e_field_from_sheet_current(
     XYZ, srcLoc, sig, t, E0=1.0, orientation="X", kappa=0.0, epsr=1.0
@@ -13,22 +15,19 @@ def e_field_from_sheet_current(
     """
 
     XYZ = utils.as_array_n_by_dim(XYZ, 3)
-    # Check
-    if XYZ.shape[0] > 1 & t.shape[0] > 1:
-        raise Exception(
-            "I/O type error: For multiple field locations only a single frequency can be specified."
-        )
+    # depths along rows and times along columns
+    t = np.atleast_1d(np.asarray(t, dtype=float)).ravel()[None, :]
 
     mu = mu_0 * (1 + kappa)
 
     if orientation == "X":
-        z = XYZ[:, 2]
+        z = XYZ[:, 2][:, None]
         bunja = -E0 * (mu * sig) ** 0.5 * z * np.exp(-(mu * sig * z ** 2) / (4 * t))
         bunmo = 2 * np.pi ** 0.5 * t ** 1.5
         Ex = bunja / bunmo
-        Ey = np.zeros_like(z)
-        Ez = np.zeros_like(z)
-        return Ex, Ey, Ez
+        Ey = np.zeros_like(Ex)
+        Ez = np.zeros_like(Ex)
+        return _squeeze_time_axis(Ex, Ey, Ez)
     else:
         raise NotImplementedError()
 
@@ -50,22 +49,19 @@ def h_field_from_sheet_current(
     """
 
     XYZ = utils.as_array_n_by_dim(XYZ, 3)
-    # Check
-    if XYZ.shape[0] > 1 & t.shape[0] > 1:
-        raise Exception(
-            "I/O type error: For multiple field locations only a single frequency can be specified."
-        )
+    # depths along rows and times along columns
+    t = np.atleast_1d(np.asarray(t, dtype=float)).ravel()[None, :]
 
     mu = mu_0 * (1 + kappa)
     if orientation == "X":
-        z = XYZ[:, 2]
-        Hx = np.zeros_like(z)
+        z = XYZ[:, 2][:, None]
         Hy = (
             E0
             * np.sqrt(sig / (np.pi * mu * t))
             * np.exp(-(mu * sig * z ** 2) / (4 * t))
         )
-        Hz = np.zeros_like(z)
-        return Hx, Hy, Hz
+        Hx = np.zeros_like(Hy)
+        Hz = np.zeros_like(Hy)
+        return _squeeze_time_axis(Hx, Hy, Hz)
     else:
         raise NotImplementedError()
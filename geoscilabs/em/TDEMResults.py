@@ -0,0 +1,301 @@
+import hashlib
+import os
+import shutil
+import tarfile
+import warnings
+from collections import OrderedDict
+from multiprocessing import Pool
+
+import deepdish as dd
+import numpy as np
+import scipy.sparse as sp
+from SimPEG import utils
+
+from .ResultStore import ResultStore, cache_directory
+
+
+def file_checksum(fname, blocksize=2 ** 20):
+    """
+    sha256 of a file
+    """
+    h = hashlib.sha256()
+    with open(fname, "rb") as f:
+        for block in iter(lambda: f.read(blocksize), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def fetch_data(url, checksum=None, offline=False, directory=None):
+    """
+    Download the tar file at url into the data cache once, verify it and
+    unzip it once, return the tar file and the directory where the data are
+
+    checksum is the sha256 of the tar file; a tar file that does not match it
+    is removed and an IOError is raised. Without a checksum the data are not
+    verified and a warning is issued. With offline=True, only files already
+    in the cache are used.
+    """
+    if directory is None:
+        directory = os.path.join(cache_directory(), "data")
+    tarball = os.path.join(directory, url.split("/")[-1])
+    datadir = os.path.splitext(tarball)[0]
+    extracted_file = os.path.join(datadir, ".extracted")
+
+    if checksum is None:
+        warnings.warn(
+            "No checksum is known for {}, the data are not verified".format(url)
+        )
+    elif len(checksum) != 64 or any(c not in "0123456789abcdef" for c in checksum):
+        raise ValueError("checksum should be the hex sha256 of the tar file")
+
+    # already extracted from a (verified) tar file
+    if os.path.exists(extracted_file):
+        with open(extracted_file) as f:
+            if checksum is None or f.read().strip() == checksum:
+                return tarball, datadir
+
+    if not os.path.exists(tarball):
+        if offline:
+            raise IOError(
+                "{} is not in the data cache {} and offline=True".format(
+                    url, directory
+                )
+            )
+        utils.download(url, folder=directory, overwrite=True)
+
+    downloaded = file_checksum(tarball)
+    if checksum is not None and downloaded != checksum:
+        os.remove(tarball)
+        raise IOError(
+            "Checksum of {} does not match, the file was removed".format(tarball)
+        )
+
+    with tarfile.open(tarball, "r") as tar:
+        if hasattr(tarfile, "data_filter"):
+            tar.extractall(directory, filter="data")
+        else:
+            tar.extractall(directory)
+    with open(extracted_file, "w") as f:
+        f.write(downloaded)
+
+    return tarball, datadir
+
+
+def evict_directories(parent, max_count, keep=None):
+    """
+    Remove the least recently used subdirectories of parent (by mtime) beyond
+    max_count, except keep, which is marked as recently used
+    """
+    if keep is not None:
+        try:
+            os.utime(keep)
+        except OSError:
+            pass
+    try:
+        names = os.listdir(parent)
+    except OSError:
+        return
+    entries = []
+    for name in names:
+        path = os.path.join(parent, name)
+        try:
+            if os.path.isdir(path) and path != keep:
+                entries.append((os.stat(path).st_mtime, path))
+        except OSError:
+            continue
+    entries.sort()
+    count = len(entries) + (keep is not None)
+    for _, path in entries[: max(count - max_count, 0)]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+class TimeSteps(object):
+    """
+    Field of shape (3 * nC, ntime) saved as name in the .h5 file fname, read
+    from disk one slice at a time instead of all at once
+
+    step(itime) keeps one .npy chunk per time step in the cache, written on
+    first access and memory-mapped afterwards. The chunks of the
+    cache_size most recently opened fields are kept.
+    """
+
+    cache_size = 16
+
+    def __init__(self, fname, name):
+        self.fname = fname
+        self.name = "/" + name
+
+        stat = os.stat(fname)
+        key = hashlib.sha1(
+            repr((os.path.abspath(fname), stat.st_size, stat.st_mtime, name)).encode()
+        ).hexdigest()
+        parent = os.path.join(cache_directory(), "tdem")
+        self.directory = os.path.join(parent, key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+        except OSError:
+            self.directory = None
+            return
+        evict_directories(parent, self.cache_size, keep=self.directory)
+
+    def __getitem__(self, index):
+        return dd.io.load(self.fname, self.name, sel=dd.aslice[index])
+
+    def step(self, itime):
+        if self.directory is None:
+            return self[:, itime]
+
+        chunk = os.path.join(self.directory, "{:d}.npy".format(itime))
+        if not os.path.exists(chunk):
+            with open(chunk + ".tmp", "wb") as f:
+                np.save(f, self[:, itime])
+            os.replace(chunk + ".tmp", chunk)
+        return np.load(chunk, mmap_mode="r")
+
+
+class MeshContext(object):
+    """
+    Mesh of a simulation with its core mesh within xyzlim and the operators
+    interpolating the edges (Ex, Ey, Ez) and faces (Fx, Fy, Fz) of the mesh
+    to the cell centers of the core mesh
+
+    The operators only depend on the mesh and xyzlim; they are saved as .npz
+    sparse matrices in cache_directory() once and loaded afterwards, the
+    operators of the cache_size most recently used meshes are kept there. Use
+    get_mesh_context to share one context between the runs of a process.
+    """
+
+    locations = ["Ex", "Ey", "Ez", "Fx", "Fy", "Fz"]
+    cache_size = 8
+
+    def __init__(self, mesh, xyzlim, directory=None):
+        self.mesh = mesh
+        self.xyzlim = np.asarray(xyzlim, dtype=float)
+        self.actinds, self.meshCore = utils.extract_core_mesh(self.xyzlim, mesh)
+        parent = None
+        if directory is None:
+            parent = os.path.join(cache_directory(), "mesh")
+            directory = os.path.join(parent, mesh_context_key(mesh, self.xyzlim))
+        self.directory = directory
+
+        self.P = {}
+        for locType in self.locations:
+            fname = os.path.join(directory, locType + ".npz")
+            try:
+                P = sp.load_npz(fname)
+                if P.shape[0] != self.meshCore.nC:
+                    raise ValueError("{} does not match the mesh".format(fname))
+            except (OSError, ValueError):
+                P = mesh.get_interpolation_matrix(
+                    self.meshCore.gridCC, location_type=locType
+                ).tocsr()
+                try:
+                    os.makedirs(directory, exist_ok=True)
+                    with open(fname + ".tmp", "wb") as f:
+                        sp.save_npz(f, P)
+                    os.replace(fname + ".tmp", fname)
+                except OSError:
+                    pass
+            self.P[locType] = P
+
+        if parent is not None and os.path.isdir(directory):
+            evict_directories(parent, self.cache_size, keep=directory)
+
+    def getEBJcore(self, f, src, sigma):
+        """
+        E, B and J of the source src in the fields f on the core mesh, sigma
+        is the conductivity of the full mesh
+        """
+        P = self.P
+        sigma_core = sigma[self.actinds]
+        B0 = np.r_[P["Fx"] * f[src, "b"], P["Fy"] * f[src, "b"], P["Fz"] * f[src, "b"]]
+        E0 = np.r_[P["Ex"] * f[src, "e"], P["Ey"] * f[src, "e"], P["Ez"] * f[src, "e"]]
+        J0 = utils.sdiag(np.r_[sigma_core, sigma_core, sigma_core]) * E0
+        return E0, B0, J0
+
+
+def mesh_context_key(mesh, xyzlim):
+    return ResultStore.key(*mesh.h, mesh.origin, np.asarray(xyzlim, dtype=float))
+
+
+_mesh_contexts = OrderedDict()
+mesh_context_cache_size = 4
+
+
+def get_mesh_context(mesh, xyzlim):
+    """
+    MeshContext of mesh and xyzlim, shared by the calls with the same mesh
+    """
+    key = mesh_context_key(mesh, xyzlim)
+    if key in _mesh_contexts:
+        _mesh_contexts.move_to_end(key)
+        return _mesh_contexts[key]
+    context = MeshContext(mesh, xyzlim)
+    _mesh_contexts[key] = context
+    while len(_mesh_contexts) > mesh_context_cache_size:
+        _mesh_contexts.popitem(last=False)
+    return context
+
+
+def _run_configuration(run, fname, kwargs):
+    run(fname=fname + ".tmp", **kwargs)
+    os.replace(fname + ".tmp", fname)
+    return fname
+
+
+def sweep_directory():
+    """
+    Directory of the results of run_sweep, apart from the other entries of
+    the result store so that they do not compete for its size
+    """
+    return os.path.join(cache_directory(), "sweeps")
+
+
+def run_sweep(run, configs, parameters, n_jobs=1, store=None, max_tasks_per_child=1):
+    """
+    Run the simulation run(fname=..., **kwargs) for each (sigma_block,
+    sigma_halfspace, src_type) in configs and return the .h5 file of each
+    configuration
+
+    Only the names in parameters are passed to run and enter the key, so
+    configurations differing in a value the run ignores are run once. The
+    results are written into the result store (by default a ResultStore in
+    sweep_directory() of 5 GB) and configurations already in it are not run
+    again. With n_jobs > 1 the configurations run in a process pool whose
+    workers exit after max_tasks_per_child simulations, so the memory of the
+    solvers is returned between runs. The results of the
+    sweep are kept when the store is evicted afterwards.
+    """
+    if store is None:
+        store = ResultStore(sweep_directory(), max_size=5e9)
+    if not store.enabled:
+        raise IOError("The result store {} cannot be created".format(store.directory))
+
+    names = ("sigma_block", "sigma_halfspace", "src_type")
+    fnames = []
+    todo = {}
+    for config in configs:
+        config = dict(zip(names, config))
+        kwargs = {name: config[name] for name in parameters}
+        for name in ("sigma_block", "sigma_halfspace"):
+            if name in kwargs:
+                kwargs[name] = float(kwargs[name])
+
+        values = ["{}={!r}".format(name, kwargs[name]) for name in parameters]
+        key = ResultStore.key(run.__module__, run.__name__, *values)
+        fname = store.path(key, ".h5")
+        fnames.append(fname)
+        if not store.contains(key, ".h5"):
+            todo[fname] = kwargs
+
+    if n_jobs == 1 or len(todo) < 2:
+        for fname, kwargs in todo.items():
+            _run_configuration(run, fname, kwargs)
+    else:
+        tasks = [(run, fname, kwargs) for fname, kwargs in todo.items()]
+        nproc = min(n_jobs, len(todo))
+        with Pool(nproc, maxtasksperchild=max_tasks_per_child) as pool:
+            pool.starmap(_run_configuration, tasks, chunksize=1)
+
+    store.evict(keep=fnames)
+    return fnames
@@ -0,0 +1,77 @@
+"""
+Geometry of the anomalous field of an induced sphere, shared by
+InductionSphereFEM and InductionSphereTEM. The sphere is an induced dipole of
+moment 4 pi a^3 / 3 times the primary field at its centre, times the
+excitation factor of the module.
+"""
+
+import numpy as np
+
+
+def fcn_ComputeDipoleTensor(dx, dy, dz):
+    """Computes Field of Unit Dipoles at (dx,dy,dz) From the Dipole
+
+    T[..., i, j] is component i of the field of the dipole along j
+    """
+
+    d = np.stack(np.broadcast_arrays(dx, dy, dz), axis=-1).astype(float)
+    R = np.sqrt(np.sum(d ** 2, axis=-1))[..., None, None]
+    # Don't throw divide by 0 warning for 0 R
+    R[R == 0] = 1.0
+    T = 3 * d[..., :, None] * d[..., None, :] / R ** 5 - np.eye(3) / R ** 3
+
+    return T / (4 * np.pi)
+
+
+def fcn_ComputeCoupling(m, xtx, ytx, ztx, a, x0, y0, z0, xrx, yrx, zrx):
+    """Computes Tx-Sphere-Rx Coupling per Unit Excitation Factor
+
+    G[..., i, j] is component i of the anomalous field at the receiver for
+    a transmitter dipole along j, for all orientations at once. Every input
+    is broadcast, e.g. z0 = depths[:, None] and xtx, xrx of shape (nstation,)
+    give the coupling of a depth sweep along a profile. The response is
+    chi[..., None, None] * G.
+    """
+
+    Tp = fcn_ComputeDipoleTensor(x0 - xtx, y0 - ytx, z0 - ztx)
+    Ts = fcn_ComputeDipoleTensor(xrx - x0, yrx - y0, zrx - z0)
+    scale = np.asarray(4 * np.pi * a ** 3 * m / 3)[..., None, None]
+
+    return scale * np.matmul(Ts, Tp)
+
+
+_orientations = {"x": 0, "y": 1, "z": 2}
+
+
+def fcn_ComputeKernel(m, orient, xtx, ytx, ztx, a, x0, y0, z0, X, Y, Z):
+    """Computes Anomalous Field at (X,Y,Z) per Unit Excitation Factor"""
+
+    G = fcn_ComputeCoupling(m, xtx, ytx, ztx, a, x0, y0, z0, X, Y, Z)
+    G = G[..., _orientations[orient]]
+
+    return G[..., 0], G[..., 1], G[..., 2]
+
+
+def array_key(*args):
+    """Hashable key of strings, numbers and arrays"""
+    return tuple(
+        arg
+        if isinstance(arg, str)
+        else (np.shape(arg), np.asarray(arg, dtype=float).tobytes())
+        for arg in args
+    )
+
+
+def cached(cache, size, func, *args):
+    """func(*args) from the OrderedDict cache of at most size entries"""
+
+    key = array_key(*args)
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+
+    val = func(*args)
+    cache[key] = val
+    while len(cache) > size:
+        cache.popitem(last=False)
+    return val
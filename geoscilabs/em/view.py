@@ -2,6 +2,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib
 import copy
+from collections import OrderedDict
 
 matplotlib.rcParams["font.size"] = 13
 
@@ -12,12 +13,137 @@ def phase(z):
     return val
 
 
+def _section_key(*args):
+    """
+        Hashable key for a section evaluation, arrays are keyed by their values
+    """
+    key = []
+    for arg in args:
+        if isinstance(arg, (np.ndarray, list, tuple)):
+            arg = np.asarray(arg)
+            arg = (arg.shape, arg.tobytes())
+        key.append(arg)
+    return tuple(key)
+
+
+def adaptive_section(evaluate, xyz, na, nb, srcLoc, nlevel=4, tol=0.1, nnear=1.0):
+    """
+        Quadtree sampling of a plane section whose nodes xyz are ordered as a
+        (nb, na) grid. Cells start 2**nlevel nodes wide and are split when
+        they lie within nnear cell sizes of the source or when any field
+        component varies across their corners by more than tol times the
+        local vector amplitude. evaluate(xyz) is only called at new nodes,
+        the nodes inside leaf cells are filled by bilinear interpolation.
+
+        The interpolated nodes are only approximately within tol of the
+        local amplitude: on the dipole widget planes tol=0.1 gives errors of
+        up to about 6% of the local amplitude (8% on planes close to the
+        source, near nulls of the field), tol=0.01 keeps them below 1% but
+        evaluates most of the nodes.
+
+        :return: the three field components at every node (shaped (npts,)
+                 or (npts, ntime) like evaluate) and the number of kernel
+                 evaluations
+    """
+    known = np.zeros((nb, na), dtype=bool)
+    vals = []
+    srcLoc = np.asarray(srcLoc, dtype=float)
+
+    def sample(ib, ia):
+        ind = np.unique(ib * na + ia)
+        ind = ind[~known.flat[ind]]
+        if ind.size == 0:
+            return
+        out = np.stack([np.reshape(v, (ind.size, -1)) for v in evaluate(xyz[ind])])
+        if not vals:
+            vals.append(np.zeros((3, nb * na, out.shape[-1]), dtype=out.dtype))
+        vals[0][:, ind] = out
+        known.flat[ind] = True
+
+    stride = 2 ** nlevel
+    ia_nodes = np.unique(np.r_[np.arange(0, na, stride), na - 1])
+    ib_nodes = np.unique(np.r_[np.arange(0, nb, stride), nb - 1])
+    A0, B0 = np.meshgrid(ia_nodes[:-1], ib_nodes[:-1])
+    A1, B1 = np.meshgrid(ia_nodes[1:], ib_nodes[1:])
+    a0, a1, b0, b1 = A0.ravel(), A1.ravel(), B0.ravel(), B1.ravel()
+
+    leaves = []
+    while a0.size > 0:
+        corners = [(b0, a0), (b0, a1), (b1, a0), (b1, a1)]
+        sample(
+            np.concatenate([c[0] for c in corners]),
+            np.concatenate([c[1] for c in corners]),
+        )
+
+        # (4, 3, ncell, ntime) field values at the cell corners
+        cval = np.stack([vals[0][:, ib * na + ia] for ib, ia in corners])
+        scale = np.sqrt((np.abs(cval) ** 2).sum(axis=1)).max(axis=0)
+        scale[scale == 0.0] = 1.0
+        spread = np.maximum(np.ptp(cval.real, axis=0), np.ptp(cval.imag, axis=0))
+        steep = (spread / scale).max(axis=(0, 2)) > tol
+
+        lo, hi = xyz[b0 * na + a0], xyz[b1 * na + a1]
+        size = np.linalg.norm(hi - lo, axis=1)
+        near = np.linalg.norm(0.5 * (lo + hi) - srcLoc, axis=1) < nnear * size
+
+        splittable = (b1 - b0 > 1) | (a1 - a0 > 1)
+        refine = splittable & (steep | near)
+        leaves.append((a0[~refine], a1[~refine], b0[~refine], b1[~refine]))
+
+        a0, a1, b0, b1 = a0[refine], a1[refine], b0[refine], b1[refine]
+        am = np.where(a1 - a0 > 1, (a0 + a1) // 2, a1)
+        bm = np.where(b1 - b0 > 1, (b0 + b1) // 2, b1)
+        a0, a1, b0, b1 = (
+            np.r_[a0, am, a0, am],
+            np.r_[am, a1, am, a1],
+            np.r_[b0, b0, bm, bm],
+            np.r_[bm, bm, b1, b1],
+        )
+        keep = (a1 > a0) & (b1 > b0)
+        a0, a1, b0, b1 = a0[keep], a1[keep], b0[keep], b1[keep]
+
+    nevals = int(known.sum())
+    val = vals[0]
+    a0, a1, b0, b1 = (np.concatenate(v) for v in zip(*leaves))
+    sizes = np.c_[a1 - a0, b1 - b0]
+    # leaves of the same size are filled together
+    for da, db in np.unique(sizes[(sizes > 1).any(axis=1)], axis=0):
+        cells = np.where((sizes[:, 0] == da) & (sizes[:, 1] == db))[0]
+        OA, OB = np.meshgrid(np.arange(da + 1), np.arange(db + 1))
+        u, w = (OA.ravel() / da)[:, None], (OB.ravel() / db)[:, None]
+        ind = (b0[cells, None] + OB.ravel()) * na + a0[cells, None] + OA.ravel()
+        c00 = val[:, b0[cells] * na + a0[cells]][:, :, None]
+        c01 = val[:, b0[cells] * na + a1[cells]][:, :, None]
+        c10 = val[:, b1[cells] * na + a0[cells]][:, :, None]
+        c11 = val[:, b1[cells] * na + a1[cells]][:, :, None]
+        interp = (
+            (1 - u) * (1 - w) * c00
+            + u * (1 - w) * c01
+            + (1 - u) * w * c10
+            + u * w * c11
+        )
+        fill = ~known.flat[ind]
+        val[:, ind[fill]] = interp[:, fill]
+
+    if val.shape[-1] == 1:
+        val = val[..., 0]
+    return tuple(val), nevals
+
+
 class DataView(object):
     """
         Provides viewingtions for Data
         This can be inherited by XXX
     """
 
+    # number of evaluated sections kept by eval_2D and eval_2D_TD
+    cache_size = 16
+    # refinement tolerance of adaptive_section for adaptive=True
+    adaptive_tol = 0.1
+
+    def __init__(self):
+        self._section_cache = OrderedDict()
+
     def set_xyz(self, x, y, z, normal="Z", geometry="grid"):
         self.normal = normal
         self.geometry = geometry
@@ -76,18 +202,57 @@ class DataView(object):
         self.orientation = orientation
         self.normal = normal
         self.func1D = func
-        self.val_xfs = np.zeros((len(log_sigvec), len(log_fvec)), dtype=complex)
-        self.val_yfs = np.zeros((len(log_sigvec), len(log_fvec)), dtype=complex)
-        self.val_zfs = np.zeros((len(log_sigvec), len(log_fvec)), dtype=complex)
 
-        for n in range(len(log_sigvec)):
-            self.val_xfs[n], self.val_yfs[n], self.val_zfs[n] = func(
-                self.obsLoc,
-                srcLoc,
-                10.0 ** log_sigvec[n],
-                10.0 ** log_fvec,
-                orientation=self.orientation,
-            )
+        cube = self.eval_response_cube(
+            srcLoc, obsLoc, log_sigvec, log_fvec, orientation, func
+        )
+        self.val_xfs, self.val_yfs, self.val_zfs = cube[:, 0]
+
+    def eval_response_cube(
+        self, srcLoc, obsLocs, log_sigvec, log_fvec, orientation, func
+    ):
+        """
+            Response of func over the full (sigma, frequency) grid for a set of
+            observation points, evaluated in a single vectorized call and kept
+            in the section cache. Returns a complex array of shape
+            (3, nobs, nsig, nfreq) holding the x, y and z components.
+        """
+        obsLocs = np.atleast_2d(obsLocs)
+        sigvec = 10.0 ** np.asarray(log_sigvec, dtype=float)
+        fvec = 10.0 ** np.asarray(log_fvec, dtype=float)
+        nobs, nsig, nfreq = obsLocs.shape[0], sigvec.size, fvec.size
+
+        def evaluate():
+            # one row per (location, sigma, frequency) triplet
+            xyz = np.repeat(obsLocs, nsig * nfreq, axis=0)
+            sig = np.tile(np.repeat(sigvec, nfreq), nobs)
+            f = np.tile(fvec, nobs * nsig)
+            vals = func(xyz, srcLoc, sig, f, orientation=orientation)
+            return np.stack(vals).reshape(3, nobs, nsig, nfreq)
+
+        key = _section_key(func, srcLoc, obsLocs, log_sigvec, log_fvec, orientation)
+        return self._cached_section(key, evaluate)["vals"]
+
+    def _eval_loc_1D(self, absloc, coordloc):
+        """
+            Slice the response cube at a point of the current plane
+        """
+        if self.normal.upper() == "Z":
+            obsLoc = np.c_[absloc, coordloc, self.z]
+        elif self.normal.upper() == "Y":
+            obsLoc = np.c_[absloc, self.y, coordloc]
+        elif self.normal.upper() == "X":
+            obsLoc = np.c_[self.x, absloc, coordloc]
+
+        self.eval_loc(
+            self.srcLoc,
+            obsLoc,
+            self.log_sigvec,
+            self.log_fvec,
+            self.orientation,
+            self.normal,
+            self.func1D,
+        )
 
     def eval(self, xyz, srcLoc, sig, f, orientation, func, normal="Z", t=0.0):
         val_x, val_y, val_z = func(xyz, srcLoc, sig, f, orientation=orientation, t=t)
@@ -97,56 +262,97 @@ class DataView(object):
         val_x, val_y, val_z = func(xyz, srcLoc, sig, t, orientation=orientation)
         return val_x, val_y, val_z
 
-    def eval_2D(self, srcLoc, sig, f, orientation, func, t=0.0):
+    def eval_2D(self, srcLoc, sig, f, orientation, func, t=0.0, adaptive=False):
         self.func2D = func
         self.srcLoc = srcLoc
         self.sig = sig
         self.t = f
         self.orientation = orientation
-        self.val_x, self.val_y, self.val_z = func(
-            self.xyz, srcLoc, sig, f, orientation=orientation, t=t
-        )
-
-        if self.normal.upper() == "X":
 
-            def Freshape(v):
-                return v.reshape(self.ncy, self.ncz)
-
-        elif self.normal.upper() == "Y":
-
-            def Freshape(v):
-                return v.reshape(self.ncx, self.ncz)
-
-        elif self.normal == "Z":
-
-            def Freshape(v):
-                return v.reshape(self.ncx, self.ncy)
-
-        self.VAL_X = Freshape(self.val_x)
-        self.VAL_Y = Freshape(self.val_y)
-        self.VAL_Z = Freshape(self.val_z)
-        self.VEC_R_amp = np.sqrt(
-            self.VAL_X.real ** 2 + self.VAL_Y.real ** 2 + self.VAL_Z.real ** 2
-        )
-        self.VEC_I_amp = np.sqrt(
-            self.VAL_X.imag ** 2 + self.VAL_Y.imag ** 2 + self.VAL_Z.imag ** 2
-        )
-        self.VEC_A_amp = np.sqrt(
-            np.abs(self.VAL_X) ** 2 + np.abs(self.VAL_Y) ** 2 + np.abs(self.VAL_Z) ** 2
-        )
-        self.VEC_P_amp = np.sqrt(
-            phase(self.VAL_X) ** 2 + phase(self.VAL_Y) ** 2 + phase(self.VAL_Z) ** 2
-        )
+        def evaluate():
+            return self._eval_section(
+                lambda xyz: func(xyz, srcLoc, sig, f, orientation=orientation, t=t),
+                srcLoc,
+                adaptive,
+            )
 
-    def eval_2D_TD(self, srcLoc, sig, t, orientation, func):
+        key = _section_key(
+            func,
+            srcLoc,
+            sig,
+            f,
+            orientation,
+            t,
+            self.normal,
+            self.xyz,
+            adaptive and self.adaptive_tol,
+        )
+        section = self._cached_section(key, evaluate)
+        self._set_section(*section["vals"], derived=section["derived"])
+
+    def eval_2D_TD(self, srcLoc, sig, t, orientation, func, adaptive=False):
         self.func2D = func
         self.srcLoc = srcLoc
         self.sig = sig
         self.t = t
         self.orientation = orientation
-        self.val_x, self.val_y, self.val_z = func(
-            self.xyz, srcLoc, sig, t, orientation=orientation
+
+        def evaluate():
+            return self._eval_section(
+                lambda xyz: func(xyz, srcLoc, sig, t, orientation=orientation),
+                srcLoc,
+                adaptive,
+            )
+
+        key = _section_key(
+            func,
+            srcLoc,
+            sig,
+            t,
+            orientation,
+            self.normal,
+            self.xyz,
+            adaptive and self.adaptive_tol,
         )
+        section = self._cached_section(key, evaluate)
+        self._set_section(*section["vals"], derived=section["derived"])
+
+    def _eval_section(self, evaluate, srcLoc, adaptive):
+        """
+            Fields over self.xyz, either at every node or through the quadtree
+            sampler of adaptive_section. The number of kernel evaluations is
+            kept in self.nevals.
+        """
+        if not adaptive:
+            self.nevals = self.xyz.shape[0]
+            return evaluate(self.xyz)
+
+        if self.normal.upper() == "X":
+            nb, na = self.ncz, self.ncy
+        elif self.normal.upper() == "Y":
+            nb, na = self.ncz, self.ncx
+        elif self.normal.upper() == "Z":
+            nb, na = self.ncy, self.ncx
+        vals, self.nevals = adaptive_section(
+            evaluate, self.xyz, na, nb, srcLoc, tol=self.adaptive_tol
+        )
+        return vals
+
+    def _cached_section(self, key, evaluate):
+        """
+            Fields of a section from the LRU cache, evaluated on a miss
+        """
+        cache = self._section_cache
+        if key in cache:
+            cache.move_to_end(key)
+        else:
+            cache[key] = {"vals": evaluate(), "derived": {}}
+            while len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return cache[key]
+
+    def _set_section(self, val_x, val_y, val_z, derived):
+        self.val_x, self.val_y, self.val_z = val_x, val_y, val_z
 
         if self.normal.upper() == "X":
 
@@ -166,9 +372,37 @@ class DataView(object):
         self.VAL_X = Freshape(self.val_x)
         self.VAL_Y = Freshape(self.val_y)
         self.VAL_Z = Freshape(self.val_z)
-        self.VEC_amp = np.sqrt(
-            self.VAL_X.real ** 2 + self.VAL_Y.real ** 2 + self.VAL_Z.real ** 2
-        )
+        self._derived = derived
+
+    def _vector_amplitude(self, name, part):
+        """
+            Vector amplitude of a part of the section, computed on first request
+        """
+        if name not in self._derived:
+            self._derived[name] = np.sqrt(
+                part(self.VAL_X) ** 2 + part(self.VAL_Y) ** 2 + part(self.VAL_Z) ** 2
+            )
+        return self._derived[name]
+
+    @property
+    def VEC_R_amp(self):
+        return self._vector_amplitude("VEC_R_amp", np.real)
+
+    @property
+    def VEC_I_amp(self):
+        return self._vector_amplitude("VEC_I_amp", np.imag)
+
+    @property
+    def VEC_A_amp(self):
+        return self._vector_amplitude("VEC_A_amp", np.abs)
+
+    @property
+    def VEC_P_amp(self):
+        return self._vector_amplitude("VEC_P_amp", phase)
+
+    @property
+    def VEC_amp(self):
+        return self._vector_amplitude("VEC_amp", np.real)
 
     def plot2D_FD(
         self,
@@ -557,7 +791,7 @@ class DataView(object):
 
         slice_ind = 0
         if slic is None:
-            slice_ind = np.minimum(len(self.sigvec), len(self.fvec)) / 2
+            slice_ind = np.minimum(len(self.sigvec), len(self.fvec)) // 2
             if abscisse.upper() == "CONDUCTIVITY":
                 slic = self.log_fvec[slice_ind]
 
@@ -739,16 +973,7 @@ class DataView(object):
 
     def plot_1D_RI_f_x(self, absloc, coordloc, ax0, ax1, sigind):
 
-        if self.normal.upper() == "Z":
-            obsLoc = np.c_[absloc, coordloc, self.z]
-        elif self.normal.upper() == "Y":
-            obsLoc = np.c_[absloc, self.y, coordloc]
-        elif self.normal.upper() == "X":
-            obsLoc = np.c_[self.x, absloc, coordloc]
-
-        self.eval_loc(
-            self.srcLoc, obsLoc, self.sigvec, self.fvec, self.orientation, self.func1D
-        )
+        self._eval_loc_1D(absloc, coordloc)
 
         ax0.set_xlabel("Frequency (Hz)")
         ax1.set_xlabel("Frequency (Hz)")
@@ -807,16 +1032,7 @@ class DataView(object):
 
     def plot_1D_AP_f_x(self, absloc, coordloc, ax0, ax1, sigind):
 
-        if self.normal.upper() == "Z":
-            obsLoc = np.c_[absloc, coordloc, self.z]
-        elif self.normal.upper() == "Y":
-            obsLoc = np.c_[absloc, self.y, coordloc]
-        elif self.normal.upper() == "X":
-            obsLoc = np.c_[self.x, absloc, coordloc]
-
-        self.eval_loc(
-            self.srcLoc, obsLoc, self.sigvec, self.fvec, self.orientation, self.func1D
-        )
+        self._eval_loc_1D(absloc, coordloc)
 
         ax0.set_xlabel("Frequency (Hz)")
         ax1.set_xlabel("Frequency (Hz)")
@@ -877,16 +1093,7 @@ class DataView(object):
 
     def plot_1D_RI_sig_x(self, absloc, coordloc, ax0, ax1, freqind):
 
-        if self.normal.upper() == "Z":
-            obsLoc = np.c_[absloc, coordloc, self.z]
-        elif self.normal.upper() == "Y":
-            obsLoc = np.c_[absloc, self.y, coordloc]
-        elif self.normal.upper() == "X":
-            obsLoc = np.c_[self.x, absloc, coordloc]
-
-        self.eval_loc(
-            self.srcLoc, obsLoc, self.sigvec, self.fvec, self.orientation, self.func1D
-        )
+        self._eval_loc_1D(absloc, coordloc)
 
         ax0.set_xlabel("Conductivity (S/m)")
         ax1.set_xlabel("Conductivity (S/m)")
@@ -948,16 +1155,7 @@ class DataView(object):
 
     def plot_1D_AP_sig_x(self, absloc, coordloc, ax0, ax1, freqind):
 
-        if self.normal.upper() == "Z":
-            obsLoc = np.c_[absloc, coordloc, self.z]
-        elif self.normal.upper() == "Y":
-            obsLoc = np.c_[absloc, self.y, coordloc]
-        elif self.normal.upper() == "X":
-            obsLoc = np.c_[self.x, absloc, coordloc]
-
-        self.eval_loc(
-            self.srcLoc, obsLoc, self.sigvec, self.fvec, self.orientation, self.func1D
-        )
+        self._eval_loc_1D(absloc, coordloc)
 
         ax0.set_xlabel("Conductivity (S/m)")
         ax1.set_xlabel("Conductivity (S/m)")
@@ -1019,46 +1217,19 @@ class DataView(object):
 
     def plot_1D_phasor_f_x(self, absloc, coordloc, ax, sigind):
 
-        if self.normal.upper() == "Z":
-            obsLoc = np.c_[absloc, coordloc, self.z]
-        elif self.normal.upper() == "Y":
-            obsLoc = np.c_[absloc, self.y, coordloc]
-        elif self.normal.upper() == "X":
-            obsLoc = np.c_[self.x, absloc, coordloc]
-
-        self.eval_loc(
-            self.srcLoc, obsLoc, self.sigvec, self.fvec, self.orientation, self.func1D
-        )
+        self._eval_loc_1D(absloc, coordloc)
 
         ax.plot(self.val_xfs.real[sigind, :], self.val_xfs.imag[sigind, :])
 
     def plot_1D_phasor_sig_x(self, absloc, coordloc, ax, freqind):
 
-        if self.normal.upper() == "Z":
-            obsLoc = np.c_[absloc, coordloc, self.z]
-        elif self.normal.upper() == "Y":
-            obsLoc = np.c_[absloc, self.y, coordloc]
-        elif self.normal.upper() == "X":
-            obsLoc = np.c_[self.x, absloc, coordloc]
-
-        self.eval_loc(
-            self.srcLoc, obsLoc, self.sigvec, self.fvec, self.orientation, self.func1D
-        )
+        self._eval_loc_1D(absloc, coordloc)
 
         ax.plot(self.val_xfs.real[:, freqind], self.val_xfs.imag[:, freqind])
 
     def plot_1D_RI_f_y(self, absloc, coordloc, ax0, ax1, sigind):
 
-        if self.normal.upper() == "Z":
-            obsLoc = np.c_[absloc, coordloc, self.z]
-        elif self.normal.upper() == "Y":
-            obsLoc = np.c_[absloc, self.y, coordloc]
-        elif self.normal.upper() == "X":
-            obsLoc = np.c_[self.x, absloc, coordloc]
-
-        self.eval_loc(
-            self.srcLoc, obsLoc, self.sigvec, self.fvec, self.orientation, self.func1D
-        )
+        self._eval_loc_1D(absloc, coordloc)
 
         ax0.set_xlabel("Frequency (Hz)")
         ax1.set_xlabel("Frequency (Hz)")
@@ -1117,16 +1288,7 @@ class DataView(object):
 
     def plot_1D_AP_f_y(self, absloc, coordloc, ax0, ax1, sigind):
 
-        if self.normal.upper() == "Z":
-            obsLoc = np.c_[absloc, coordloc, self.z]
-        elif self.normal.upper() == "Y":
-            obsLoc = np.c_[absloc, self.y, coordloc]
-        elif self.normal.upper() == "X":
-            obsLoc = np.c_[self.x, absloc, coordloc]
-
-        self.eval_loc(
-            self.srcLoc, obsLoc, self.sigvec, self.fvec, self.orientation, self.func1D
-        )
+        self._eval_loc_1D(absloc, coordloc)
 
         ax0.set_xlabel("Frequency (Hz)")
         ax1.set_xlabel("Frequency (Hz)")
@@ -1191,16 +1353,7 @@ class DataView(object):
 
     def plot_1D_RI_sig_y(self, absloc, coordloc, ax0, ax1, freqind):
 
-        if self.normal.upper() == "Z":
-            obsLoc = np.c_[absloc, coordloc, self.z]
-        elif self.normal.upper() == "Y":
-            obsLoc = np.c_[absloc, self.y, coordloc]
-        elif self.normal.upper() == "X":
-            obsLoc = np.c_[self.x, absloc, coordloc]
-
-        self.eval_loc(
-            self.srcLoc, obsLoc, self.sigvec, self.fvec, self.orientation, self.func1D
-        )
+        self._eval_loc_1D(absloc, coordloc)
 
         ax0.set_xlabel("Conductivity (S/m)")
         ax1.set_xlabel("Conductivity (S/m)")
@@ -1266,16 +1419,7 @@ class DataView(object):
 
     def plot_1D_AP_sig_y(self, absloc, coordloc, ax0, ax1, freqind):
 
-        if self.normal.upper() == "Z":
-            obsLoc = np.c_[absloc, coordloc, self.z]
-        elif self.normal.upper() == "Y":
-            obsLoc = np.c_[absloc, self.y, coordloc]
-        elif self.normal.upper() == "X":
-            obsLoc = np.c_[self.x, absloc, coordloc]
-
-        self.eval_loc(
-            self.srcLoc, obsLoc, self.sigvec, self.fvec, self.orientation, self.func1D
-        )
+        self._eval_loc_1D(absloc, coordloc)
 
         ax0.set_xlabel("Conductivity (S/m)")
         ax1.set_xlabel("Conductivity (S/m)")
@@ -1341,46 +1485,19 @@ class DataView(object):
 
     def plot_1D_phasor_f_y(self, absloc, coordloc, ax, sigind):
 
-        if self.normal.upper() == "Z":
-            obsLoc = np.c_[absloc, coordloc, self.z]
-        elif self.normal.upper() == "Y":
-            obsLoc = np.c_[absloc, self.y, coordloc]
-        elif self.normal.upper() == "X":
-            obsLoc = np.c_[self.x, absloc, coordloc]
-
-        self.eval_loc(
-            self.srcLoc, obsLoc, self.sigvec, self.fvec, self.orientation, self.func1D
-        )
+        self._eval_loc_1D(absloc, coordloc)
 
         ax.plot(self.val_yfs.real[sigind, :], self.val_yfs.imag[sigind, :])
 
     def plot_1D_phasor_sig_y(self, absloc, coordloc, ax, freqind):
 
-        if self.normal.upper() == "Z":
-            obsLoc = np.c_[absloc, coordloc, self.z]
-        elif self.normal.upper() == "Y":
-            obsLoc = np.c_[absloc, self.y, coordloc]
-        elif self.normal.upper() == "X":
-            obsLoc = np.c_[self.x, absloc, coordloc]
-
-        self.eval_loc(
-            self.srcLoc, obsLoc, self.sigvec, self.fvec, self.orientation, self.func1D
-        )
+        self._eval_loc_1D(absloc, coordloc)
 
         ax.plot(self.val_yfs.real[:, freqind], self.val_yfs.imag[:, freqind])
 
     def plot_1D_RI_f_z(self, absloc, coordloc, ax0, ax1, sigind):
 
-        if self.normal.upper() == "Z":
-            obsLoc = np.c_[absloc, coordloc, self.z]
-        elif self.normal.upper() == "Y":
-            obsLoc = np.c_[absloc, self.y, coordloc]
-        elif self.normal.upper() == "X":
-            obsLoc = np.c_[self.x, absloc, coordloc]
-
-        self.eval_loc(
-            self.srcLoc, obsLoc, self.sigvec, self.fvec, self.orientation, self.func1D
-        )
+        self._eval_loc_1D(absloc, coordloc)
 
         ax0.set_xlabel("Frequency (Hz)")
         ax1.set_xlabel("Frequency (Hz)")
@@ -1443,16 +1560,7 @@ class DataView(object):
 
     def plot_1D_AP_f_z(self, absloc, coordloc, ax0, ax1, sigind):
 
-        if self.normal.upper() == "Z":
-            obsLoc = np.c_[absloc, coordloc, self.z]
-        elif self.normal.upper() == "Y":
-            obsLoc = np.c_[absloc, self.y, coordloc]
-        elif self.normal.upper() == "X":
-            obsLoc = np.c_[self.x, absloc, coordloc]
-
-        self.eval_loc(
-            self.srcLoc, obsLoc, self.sigvec, self.fvec, self.orientation, self.func1D
-        )
+        self._eval_loc_1D(absloc, coordloc)
 
         ax0.set_xlabel("Frequency (Hz)")
         ax1.set_xlabel("Frequency (Hz)")
@@ -1517,16 +1625,7 @@ class DataView(object):
 
     def plot_1D_RI_sig_z(self, absloc, coordloc, ax0, ax1, freqind):
 
-        if self.normal.upper() == "Z":
-            obsLoc = np.c_[absloc, coordloc, self.z]
-        elif self.normal.upper() == "Y":
-            obsLoc = np.c_[absloc, self.y, coordloc]
-        elif self.normal.upper() == "X":
-            obsLoc = np.c_[self.x, absloc, coordloc]
-
-        self.eval_loc(
-            self.srcLoc, obsLoc, self.sigvec, self.fvec, self.orientation, self.func1D
-        )
+        self._eval_loc_1D(absloc, coordloc)
 
         ax0.set_xlabel("Conductivity (S/m)")
         ax1.set_xlabel("Conductivity (S/m)")
@@ -1588,16 +1687,7 @@ class DataView(object):
 
     def plot_1D_AP_sig_z(self, absloc, coordloc, ax0, ax1, freqind):
 
-        if self.normal.upper() == "Z":
-            obsLoc = np.c_[absloc, coordloc, self.z]
-        elif self.normal.upper() == "Y":
-            obsLoc = np.c_[absloc, self.y, coordloc]
-        elif self.normal.upper() == "X":
-            obsLoc = np.c_[self.x, absloc, coordloc]
-
-        self.eval_loc(
-            self.srcLoc, obsLoc, self.sigvec, self.fvec, self.orientation, self.func1D
-        )
+        self._eval_loc_1D(absloc, coordloc)
 
         ax0.set_xlabel("Conductivity (S/m)")
         ax1.set_xlabel("Conductivity (S/m)")
@@ -1663,31 +1753,13 @@ class DataView(object):
 
     def plot_1D_phasor_f_z(self, absloc, coordloc, ax, sigind):
 
-        if self.normal.upper() == "Z":
-            obsLoc = np.c_[absloc, coordloc, self.z]
-        elif self.normal.upper() == "Y":
-            obsLoc = np.c_[absloc, self.y, coordloc]
-        elif self.normal.upper() == "X":
-            obsLoc = np.c_[self.x, absloc, coordloc]
-
-        self.eval_loc(
-            self.srcLoc, obsLoc, self.sigvec, self.fvec, self.orientation, self.func1D
-        )
+        self._eval_loc_1D(absloc, coordloc)
 
         ax.plot(self.val_zfs.real[sigind, :], self.val_zfs.imag[sigind, :])
 
     def plot_1D_phasor_sig_z(self, absloc, coordloc, ax, freqind):
 
-        if self.normal.upper() == "Z":
-            obsLoc = np.c_[absloc, coordloc, self.z]
-        elif self.normal.upper() == "Y":
-            obsLoc = np.c_[absloc, self.y, coordloc]
-        elif self.normal.upper() == "X":
-            obsLoc = np.c_[self.x, absloc, coordloc]
-
-        self.eval_loc(
-            self.srcLoc, obsLoc, self.sigvec, self.fvec, self.orientation, self.func1D
-        )
+        self._eval_loc_1D(absloc, coordloc)
 
         ax.plot(self.val_zfs.real[:, freqind], self.val_zfs.imag[:, freqind])
 
@@ -1705,7 +1777,13 @@ class DataView(object):
 
         obsLoc = np.c_[obslocx, obslocy, obslocz]
         self.eval_loc(
-            self.srcLoc, obsLoc, self.sigvec, self.fvec, self.orientation, self.func1D
+            self.srcLoc,
+            obsLoc,
+            self.log_sigvec,
+            self.log_fvec,
+            self.orientation,
+            self.normal,
+            self.func1D,
         )
 
         if mode == "RI":